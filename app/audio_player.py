@@ -2,27 +2,587 @@
 # app/audio_player.py
 # ==============================
 from __future__ import annotations
-import vlc
+import logging
+import os
+import threading
 import time
+import wave
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
-class AudioPlayer:
-    def __init__(self):
-        self._instance = vlc.Instance()
+log = logging.getLogger("SoundsScheduler")
+
+AUDIO_BACKENDS = ("vlc", "pcm", "null")
+
+# Garde-fous de lecture: un son bloqué ne doit pas immobiliser un worker indéfiniment
+START_TIMEOUT_S = 5.0           # délai max pour passer de Opening/Buffering à Playing
+DEADLINE_MARGIN_S = 5.0         # marge ajoutée à la durée connue du son
+UNKNOWN_DURATION_MAX_S = 3600.0 # plafond si la durée est inconnue
+PCM_MAX_SECONDS = 30.0          # au-delà, le backend PCM lit le fichier par blocs au lieu de le garder en mémoire
+PCM_STREAM_BLOCK_S = 0.5        # taille d'un bloc lu depuis le disque (fichiers longs)
+PCM_STREAM_AHEAD = 3            # blocs lus d'avance: absorbe un accès disque lent sans trou audible
+
+
+class PlaybackTimeout(Exception):
+    """La lecture a été interrompue par le chien de garde (démarrage ou durée dépassés)."""
+
+class AudioUnavailable(RuntimeError):
+    """Aucun moteur audio utilisable: le son n'a pas été joué."""
+
+class PlaybackError(RuntimeError):
+    """Le moteur audio n'a pas pu lire le fichier (absent, illisible, format non pris en charge)."""
+
+def _safe_import_vlc():
+    try:
+        import vlc  # type: ignore
+        return vlc
+    except Exception:
+        return None
+
+def _safe_import_pcm():
+    try:
+        import numpy  # type: ignore
+        import sounddevice  # type: ignore
+        import soundfile  # type: ignore
+        return numpy, sounddevice, soundfile
+    except Exception:
+        return None
+
+
+class AudioBackend(ABC):
+    """Interface commune des sorties audio utilisées par AudioPlayer.
+
+    `set_volume` et `play_blocking` sont abstraites: un backend incomplet échoue dès sa
+    création, pas au premier son planifié.
+    """
+    name = "base"
+
+    @abstractmethod
+    def set_volume(self, vol: int):
+        ...
+
+    @abstractmethod
+    def play_blocking(self, file_path: str, expected_duration: Optional[float] = None):
+        """Joue le fichier et rend la main à la fin; lève PlaybackTimeout si le chien de garde coupe."""
+
+    def set_output_device(self, device: str):
+        """Sortie utilisée par ce backend ("" = sortie par défaut)."""
+        pass
+
+    def list_devices(self) -> List[Tuple[str, str]]:
+        """[(identifiant, description)] des sorties disponibles."""
+        return []
+
+    def preload(self, paths: List[str]):
+        """Prépare les sons à l'avance (sans effet pour les backends qui décodent à la lecture)."""
+        pass
+
+    def stop(self):
+        """Coupe la lecture en cours depuis un autre thread (fermeture); sans effet si rien ne joue."""
+        pass
+
+    def close(self):
+        pass
+
+
+def _dispose_vlc(player, media, instance):
+    """Libère un lecteur VLC bloqué (thread détaché: chaque appel peut ne jamais rendre la main)."""
+    for step in (player.stop, lambda: player.set_media(None), media.release, player.release, instance.release):
+        try:
+            step()
+        except Exception as e:
+            log.warning("Libération du lecteur VLC bloqué: %s", e)
+    log.info("Lecteur VLC bloqué libéré")
+
+
+class VlcBackend(AudioBackend):
+    """Lecture via libVLC (démultiplexage / décodage à chaque lecture).
+
+    Cycle de vie borné: un seul MediaPlayer réutilisé, chaque Media est libéré après
+    sa lecture, et l'Instance VLC est recréée toutes les `recycle_every` lectures pour
+    rendre la mémoire que libVLC accumule sur des semaines de fonctionnement.
+    """
+    name = "vlc"
+
+    def __init__(self, recycle_every: int = 500):
+        self.vlc = _safe_import_vlc()
+        if self.vlc is None:
+            raise RuntimeError("python-vlc / libvlc introuvable")
+        self.recycle_every = max(1, int(recycle_every))
+        self._volume = 100
+        self._device = ""
+        self._plays = 0
+        self._lock = threading.Lock()      # un seul MediaPlayer: une lecture à la fois
+        self._instance = None
+        self._player = None
+        self._open()
+
+    def _open(self):
+        self._instance = self.vlc.Instance()
         self._player = self._instance.media_player_new()
+        self._player.audio_set_volume(self._volume)
+        if self._device:
+            self._player.audio_output_device_set(None, self._device)
+
+    def _release(self):
+        if self._player is not None:
+            self._player.stop()
+            self._player.release()
+            self._player = None
+        if self._instance is not None:
+            self._instance.release()
+            self._instance = None
+
+    def set_volume(self, vol: int):
+        self._volume = max(0, min(100, vol))
+        # sans le verrou de lecture: le volume doit pouvoir changer pendant un son
+        player = self._player
+        if player is not None:
+            player.audio_set_volume(self._volume)
+
+    def play_blocking(self, file_path: str, expected_duration: Optional[float] = None):
+        vlc = self.vlc
+        with self._lock:
+            if self._plays and self._plays % self.recycle_every == 0:
+                log.info("Recyclage de l'instance VLC après %d lectures", self._plays)
+                self._release()
+                self._open()
+            self._plays += 1
+            media = self._instance.media_new(str(Path(file_path)))
+            wedged = False
+            try:
+                self._player.set_media(media)
+                self._player.play()
+                done = (vlc.State.Ended, vlc.State.Stopped, vlc.State.Error)
+                # Wait until it starts (Opening/Buffering peut rester bloqué: partage réseau, fichier corrompu)
+                start_deadline = time.monotonic() + START_TIMEOUT_S
+                state = self._player.get_state()
+                while state != vlc.State.Playing and state not in done:
+                    if time.monotonic() > start_deadline:
+                        raise PlaybackTimeout(f"démarrage > {START_TIMEOUT_S:.0f} s (état {state})")
+                    time.sleep(0.05)
+                    state = self._player.get_state()
+                # Échéance: durée connue (VLC, sinon cache de métadonnées) + marge
+                length_ms = self._player.get_length()
+                duration = length_ms / 1000.0 if length_ms and length_ms > 0 else expected_duration
+                deadline = time.monotonic() + (duration + DEADLINE_MARGIN_S if duration else UNKNOWN_DURATION_MAX_S)
+                # Busy-wait until finished
+                while state not in done:
+                    if time.monotonic() > deadline:
+                        raise PlaybackTimeout(f"durée dépassée ({duration or UNKNOWN_DURATION_MAX_S:.1f} s + marge)")
+                    time.sleep(0.1)
+                    state = self._player.get_state()
+                if state == vlc.State.Error:
+                    # fichier absent / corrompu: VLC finit en Error sans rien jouer
+                    raise PlaybackError(f"VLC n'a pas pu lire {file_path}")
+            except PlaybackTimeout:
+                wedged = True
+                raise
+            finally:
+                if wedged:
+                    # stop()/release() d'un lecteur bloqué peuvent eux-mêmes bloquer (libVLC 3):
+                    # on les abandonne à un thread détaché et on repart tout de suite sur une instance neuve
+                    old = (self._player, media, self._instance)
+                    self._player = self._instance = None
+                    threading.Thread(target=_dispose_vlc, args=old, name="vlc-cleanup", daemon=True).start()
+                    self._open()
+                else:
+                    self._player.stop()
+                    self._player.set_media(None)
+                    media.release()
+
+    def set_output_device(self, device: str):
+        with self._lock:
+            self._device = device or ""
+            if self._player is not None and self._device:
+                self._player.audio_output_device_set(None, self._device)
+
+    def list_devices(self) -> List[Tuple[str, str]]:
+        out: List[Tuple[str, str]] = []
+        with self._lock:
+            head = self._player.audio_output_device_enum()
+        node = head
+        while node:
+            dev = node.contents
+            out.append(((dev.device or b"").decode(errors="replace"), (dev.description or b"").decode(errors="replace")))
+            node = dev.next
+        if head:
+            self.vlc.libvlc_audio_output_device_list_release(head)
+        return out
+
+    def stop(self):
+        # sans le verrou (tenu pendant toute la lecture): play_blocking voit l'état Stopped et rend la main
+        player = self._player
+        if player is not None:
+            player.stop()
+
+    def close(self):
+        with self._lock:
+            self._release()
+
+
+class PcmBackend(AudioBackend):
+    """Sons courts décodés une seule fois en mémoire puis écrits directement sur la sortie.
+
+    Le flux de sortie (sounddevice, latence "low") reste ouvert entre deux lectures: démarrer
+    un son revient à remplacer le tampon lu par le callback, d'où une latence de démarrage
+    de l'ordre d'un bloc audio (objectif < 20 ms, mesuré dans `start_latencies_ms`).
+    Le cache est borné en octets (LRU); les fichiers de plus de `max_seconds` ne sont pas
+    gardés en mémoire: ils sont lus par blocs sur le même flux, donc sur la sortie de la zone.
+    Les formats que soundfile ne sait pas lire (aac, m4a, mp3 avec un vieux libsndfile) passent
+    par VLC, sur la sortie par défaut uniquement.
+    """
+    name = "pcm"
+
+    def __init__(self, cache_bytes: int = 64 * 1024 * 1024, blocksize: int = 256, max_seconds: float = PCM_MAX_SECONDS):
+        mods = _safe_import_pcm()
+        if mods is None:
+            raise RuntimeError("numpy / sounddevice / soundfile requis pour le backend PCM")
+        self.np, self.sd, self.sf = mods
+        self.cache_bytes = cache_bytes
+        self.blocksize = blocksize
+        self._cache: "OrderedDict[str, Tuple[float, object, int]]" = OrderedDict()   # chemin -> (mtime, frames, samplerate)
+        self._cache_size = 0
+        self._gain = 1.0
+        self._lock = threading.Lock()
+        self._stream = None
+        self._stream_fmt: Optional[Tuple[int, int]] = None      # (samplerate, channels)
+        self._device = None
+        self._buf = None            # tampon en cours de lecture par le callback
+        self._pos = 0
+        self._chunks: "deque[object]" = deque()     # tampons suivants (un seul pour un son court)
+        self._eof = True            # plus aucun tampon à venir pour la lecture en cours
+        self._done = threading.Event()
+        self._play_lock = threading.Lock()
+        self.max_seconds = max_seconds
+        self._too_long: Dict[str, float] = {}     # chemin -> mtime des fichiers lus par blocs
+        self._unreadable: Dict[str, float] = {}   # chemin -> mtime des fichiers confiés à VLC
+        self._vlc_backend: Optional[VlcBackend] = None
+        self._volume = 100
+        # latence mesurée entre la remise du tampon et son premier bloc lu par le callback
+        self.start_latencies_ms: "deque[float]" = deque(maxlen=500)
+        self._handoff = 0.0
+
+    def set_volume(self, vol: int):
+        self._volume = max(0, min(100, vol))
+        self._gain = self._volume / 100.0
+        if self._vlc_backend is not None:
+            self._vlc_backend.set_volume(self._volume)
+
+    # --- décodage / cache
+    def _is_long(self, file_path: str, mtime: float) -> bool:
+        """Vrai si le fichier dépasse `max_seconds` (lecture de l'en-tête seulement)."""
+        if self._too_long.get(file_path) == mtime:
+            return True
+        info = self.sf.info(file_path)
+        if info.samplerate and info.frames / float(info.samplerate) > self.max_seconds:
+            self._too_long[file_path] = mtime
+            return True
+        return False
+
+    def _load(self, file_path: str):
+        """(données, fréquence) du cache, ou None si le fichier n'est pas décodé en mémoire (long ou illisible)."""
+        mtime = os.path.getmtime(file_path)
+        with self._lock:
+            hit = self._cache.get(file_path)
+            if hit and hit[0] == mtime:
+                self._cache.move_to_end(file_path)
+                return hit[1], hit[2]
+        if self._unreadable.get(file_path) == mtime:
+            return None
+        try:
+            if self._is_long(file_path, mtime):
+                return None
+            data, sr = self.sf.read(file_path, dtype="float32", always_2d=True)
+        except RuntimeError as e:       # LibsndfileError: format non pris en charge par libsndfile
+            log.info("PCM: %s non lu par soundfile (%s) — lecture via VLC", Path(file_path).name, e)
+            self._unreadable[file_path] = mtime
+            return None
+        with self._lock:
+            old = self._cache.pop(file_path, None)
+            if old:
+                self._cache_size -= old[1].nbytes
+            self._cache[file_path] = (mtime, data, sr)
+            self._cache_size += data.nbytes
+            while self._cache_size > self.cache_bytes and len(self._cache) > 1:
+                _, (_, evicted, _) = self._cache.popitem(last=False)
+                self._cache_size -= evicted.nbytes
+        return data, sr
+
+    def preload(self, paths: List[str]):
+        """Décode à l'avance (au chargement des tâches) pour que la 1re lecture soit immédiate."""
+        for p in dict.fromkeys(paths):
+            try:
+                self._load(p)
+            except Exception as e:
+                log.warning("Préchargement PCM impossible (%s): %s", p, e)
+
+    # --- sortie
+    def _callback(self, outdata, frames, _time, _status):
+        written = 0
+        while written < frames:
+            buf = self._buf
+            if buf is None:
+                if not self._chunks:
+                    break               # fin du son, ou bloc suivant pas encore lu (silence)
+                buf = self._buf = self._chunks.popleft()
+                self._pos = 0
+                if self._handoff:
+                    self.start_latencies_ms.append((time.monotonic() - self._handoff) * 1000.0)
+                    self._handoff = 0.0
+            chunk = buf[self._pos:self._pos + frames - written]
+            n = len(chunk)
+            outdata[written:written + n] = chunk * self._gain
+            written += n
+            self._pos += n
+            if self._pos >= len(buf):
+                self._buf = None
+        outdata[written:] = 0
+        if self._buf is None and not self._chunks and self._eof:
+            self._done.set()
+
+    def _ensure_stream(self, samplerate: int, channels: int):
+        if self._stream is not None and self._stream_fmt == (samplerate, channels):
+            return
+        if self._stream is not None:
+            self._stream.close()
+        self._stream = self.sd.OutputStream(samplerate=samplerate, channels=channels, dtype="float32", device=self._device,
+                                            blocksize=self.blocksize, latency="low", callback=self._callback)
+        self._stream.start()
+        self._stream_fmt = (samplerate, channels)
+
+    def _begin(self):
+        self._eof = False           # avant clear(): le callback ne doit pas conclure trop tôt
+        self._chunks.clear()
+        self._buf = None
+        self._done.clear()
+        self._handoff = time.monotonic()
+
+    def _wait_done(self, deadline: float):
+        if not self._done.wait(max(0.0, deadline - time.monotonic())):
+            self._stalled()
+
+    def _stalled(self):
+        # le callback ne consomme plus (périphérique disparu…): le flux est fermé sur un thread
+        # détaché (close() peut bloquer lui aussi) et sera rouvert au prochain son
+        self._chunks.clear()
+        self._buf = None
+        self._eof = True
+        stream, self._stream, self._stream_fmt = self._stream, None, None
+        threading.Thread(target=stream.close, name="pcm-cleanup", daemon=True).start()
+        raise PlaybackTimeout("la sortie audio ne consomme plus le tampon")
+
+    def play_blocking(self, file_path: str, expected_duration: Optional[float] = None):
+        loaded = self._load(file_path)
+        if loaded is None:
+            if file_path in self._unreadable:
+                self._play_with_vlc(file_path, expected_duration)
+            else:
+                self._play_streamed(file_path)
+            return
+        data, sr = loaded
+        with self._play_lock:          # un son à la fois sur ce flux
+            self._ensure_stream(sr, data.shape[1])
+            self._begin()
+            self._chunks.append(data)
+            self._eof = True
+            self._wait_done(time.monotonic() + len(data) / float(sr) + DEADLINE_MARGIN_S)
+
+    def _play_with_vlc(self, file_path: str, expected_duration: Optional[float]):
+        if self._device is not None:
+            # les périphériques sounddevice ne parlent pas à VLC: une erreur visible plutôt qu'un son dans la mauvaise zone
+            raise PlaybackError(f"{Path(file_path).name}: format non lu par soundfile, "
+                                "VLC ne peut pas jouer sur la sortie de cette zone")
+        if self._vlc_backend is None:
+            try:
+                self._vlc_backend = VlcBackend()
+            except RuntimeError as e:
+                raise PlaybackError(f"{Path(file_path).name}: format non lu par soundfile et {e}") from e
+            self._vlc_backend.set_volume(self._volume)
+        self._vlc_backend.play_blocking(file_path, expected_duration)
+
+    def _play_streamed(self, file_path: str):
+        """Fichier long: lu par blocs depuis le disque, sur le même flux (donc la sortie de la zone)."""
+        with self.sf.SoundFile(file_path) as f, self._play_lock:
+            self._ensure_stream(f.samplerate, f.channels)
+            self._begin()
+            deadline = time.monotonic() + f.frames / float(f.samplerate) + DEADLINE_MARGIN_S
+            block = max(1, int(f.samplerate * PCM_STREAM_BLOCK_S))
+            while not self._done.is_set():         # stop(): lecture coupée
+                if len(self._chunks) >= PCM_STREAM_AHEAD:
+                    if time.monotonic() > deadline:
+                        self._stalled()
+                    time.sleep(PCM_STREAM_BLOCK_S / 4)
+                    continue
+                data = f.read(block, dtype="float32", always_2d=True)
+                if not len(data):
+                    break
+                self._chunks.append(data)
+            self._eof = True
+            self._wait_done(deadline)
+
+    def set_output_device(self, device: str):
+        # sounddevice accepte un index ou une partie du nom du périphérique
+        with self._play_lock:
+            self._device = int(device) if device and device.isdigit() else (device or None)
+            self.close()
+
+    def list_devices(self) -> List[Tuple[str, str]]:
+        return [(str(i), d["name"]) for i, d in enumerate(self.sd.query_devices()) if d["max_output_channels"] > 0]
+
+    def stop(self):
+        self._chunks.clear()        # le callback n'écrit plus que du silence
+        self._buf = None
+        self._eof = True
+        self._done.set()
+        if self._vlc_backend is not None:
+            self._vlc_backend.stop()
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+            self._stream_fmt = None
+        if self._vlc_backend is not None:
+            self._vlc_backend.close()
+            self._vlc_backend = None
+
+
+class NullBackend(AudioBackend):
+    """Sortie factice pour les tests et les mesures: rien n'est joué.
+
+    - `realtime=True` attend la durée du son (`durations[chemin]`, en-tête WAV, sinon
+      `default_duration`) via `sleep` — une horloge virtuelle peut être fournie.
+    - `sink_dir` : les WAV joués y sont réécrits avec le volume appliqué (vérification du rendu).
+    Les dernières lectures sont gardées dans `played` (chemin, volume), `plays` les compte toutes.
+    """
+    name = "null"
+
+    def __init__(self, realtime: bool = False, sink_dir: Optional[str] = None, durations: Optional[Dict[str, float]] = None,
+                 default_duration: float = 0.0, sleep=time.sleep):
+        self.realtime = realtime
+        self.default_duration = default_duration
+        self.sleep = sleep
+        self.sink_dir = Path(sink_dir) if sink_dir else None
+        self.durations = durations or {}
+        self.volume = 100
+        self.device = ""
+        self.played: "deque[Tuple[str, int]]" = deque(maxlen=1000)
+        self.plays = 0
+        if self.sink_dir:
+            self.sink_dir.mkdir(parents=True, exist_ok=True)
+
+    def set_volume(self, vol: int):
+        self.volume = max(0, min(100, vol))
+
+    def set_output_device(self, device: str):
+        self.device = device or ""
+
+    def duration_of(self, file_path: str) -> float:
+        if file_path in self.durations:
+            return float(self.durations[file_path])
+        try:
+            with wave.open(file_path, "rb") as w:
+                return w.getnframes() / float(w.getframerate() or 1)
+        except Exception:
+            return self.default_duration
+
+    def play_blocking(self, file_path: str, expected_duration: Optional[float] = None):
+        self.plays += 1
+        self.played.append((file_path, self.volume))
+        if self.sink_dir:
+            self._write_sink(file_path)
+        if self.realtime:
+            self.sleep(self.duration_of(file_path))
+
+    def _write_sink(self, file_path: str):
+        import array
+        try:
+            with wave.open(file_path, "rb") as src:
+                params = src.getparams()
+                frames = src.readframes(params.nframes)
+        except Exception as e:
+            log.warning("Sink WAV: lecture impossible (%s): %s", file_path, e)
+            return
+        if params.sampwidth == 2:
+            samples = array.array("h", frames)
+            gain = self.volume / 100.0
+            for i in range(len(samples)):
+                samples[i] = int(samples[i] * gain)
+            frames = samples.tobytes()
+        out = self.sink_dir / f"{self.plays:06d}_{Path(file_path).stem}.wav"
+        with wave.open(str(out), "wb") as dst:
+            dst.setparams(params)
+            dst.writeframes(frames)
+
+
+class UnavailableBackend(AudioBackend):
+    """Aucun moteur n'a pu être ouvert: chaque lecture échoue (exécution comptée en erreur)."""
+    name = "indisponible"
+
+    def __init__(self, reason: str):
+        self.reason = reason
 
     def set_volume(self, vol: int):
-        self._player.audio_set_volume(max(0, min(100, vol)))
-
-    def play_blocking(self, file_path: str):
-        media = self._instance.media_new(str(Path(file_path)))
-        self._player.set_media(media)
-        self._player.play()
-        # Wait until it starts
-        time.sleep(0.1)
-        # Busy-wait until finished
-        while True:
-            state = self._player.get_state()
-            if state in (vlc.State.Ended, vlc.State.Stopped, vlc.State.Error):
-                break
-            time.sleep(0.1)
\ No newline at end of file
+        pass
+
+    def play_blocking(self, file_path: str, expected_duration: Optional[float] = None):
+        raise AudioUnavailable(f"aucun moteur audio disponible ({self.reason})")
+
+
+def make_backend(name: str) -> AudioBackend:
+    """Instancie le backend demandé; PCM se rabat sur VLC si une dépendance manque.
+
+    La sortie nulle n'est utilisée que si elle est choisie explicitement: sans moteur
+    utilisable, on renvoie UnavailableBackend plutôt que de jouer en silence.
+    """
+    if name == "null":
+        return NullBackend()
+    errors = []
+    for candidate in dict.fromkeys([name, "vlc"]):
+        try:
+            if candidate == "pcm":
+                return PcmBackend()
+            if candidate == "vlc":
+                return VlcBackend()
+        except Exception as e:
+            log.error("Backend audio '%s' indisponible: %s", candidate, e)
+            errors.append(f"{candidate}: {e}")
+    return UnavailableBackend("; ".join(errors) or f"backend inconnu '{name}'")
+
+
+class AudioPlayer:
+    """Façade sur un AudioBackend (les coupures du chien de garde sont comptées dans run_stats)."""
+
+    def __init__(self, backend: str | AudioBackend = "vlc", device: str = ""):
+        self.backend = backend if isinstance(backend, AudioBackend) else make_backend(backend)
+        # problème à signaler dans l'interface (moteur remplacé ou absent), None si tout va bien
+        self.problem: Optional[str] = None
+        if isinstance(self.backend, UnavailableBackend):
+            self.problem = f"Aucun moteur audio disponible: les sons ne seront pas joués ({self.backend.reason})"
+        elif isinstance(backend, str) and self.backend.name != backend:
+            self.problem = f"Moteur audio '{backend}' indisponible, remplacé par '{self.backend.name}'"
+        if self.problem:
+            log.error(self.problem)
+        if device:
+            self.backend.set_output_device(device)
+
+    def set_volume(self, vol: int):
+        self.backend.set_volume(vol)
+
+    def play_blocking(self, file_path: str, expected_duration: Optional[float] = None):
+        self.backend.play_blocking(file_path, expected_duration)
+
+    def list_devices(self) -> List[Tuple[str, str]]:
+        return self.backend.list_devices()
+
+    def preload(self, paths: List[str]):
+        self.backend.preload(paths)
+
+    def stop(self):
+        self.backend.stop()
+
+    def close(self):
+        self.backend.close()
@@ -0,0 +1,108 @@
+# ==============================
+# app/catchup_check.py
+# ==============================
+"""Vérification du rattrapage après une veille, de bout en bout jusqu'à la file d'une zone.
+
+    python -m app.catchup_check
+
+Planifie une tâche d'intervalle sur un vrai TaskScheduler (APScheduler), simule une
+veille couvrant plusieurs déclenchements, et compte les exécutions réellement jouées
+par le ZonePlayer pour chaque politique (skip / once / all). Sort en erreur (code 1)
+si un nombre diffère de l'attendu.
+"""
+from __future__ import annotations
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+from apscheduler.triggers.interval import IntervalTrigger
+from .audio_player import AudioPlayer, NullBackend
+from .jobs import JobsMixin
+from .media_control import NullMediaController
+from .models import RunRecord, Settings, Task, TaskType
+from .scheduler import CATCHUP_MAX_RUNS, ClockJump, TaskScheduler
+from .zones import ZoneRouter
+
+PERIOD_S = 60
+
+
+class _Recorder:
+    def __init__(self):
+        self.records: List[RunRecord] = []
+
+    def record(self, rec: RunRecord):
+        self.records.append(rec)
+
+
+class CatchupHost(JobsMixin):
+    def __init__(self, policy: str, play_seconds: float):
+        self.scheduler = TaskScheduler(watch_clock=False)
+        self.scheduler.catchup_policy = policy
+        self.scheduler.job_factory = self._rebuild_job
+        self.history = _Recorder()
+        self.counters = None                # pas de max_occurrences: jamais sollicité
+        # sons de durée non nulle: les rattrapages se retrouvent ensemble dans la file de la zone
+        self.zones = ZoneRouter("null", [], player_factory=lambda backend, device="": AudioPlayer(
+            NullBackend(realtime=True, default_duration=play_seconds)))
+        self.media = NullMediaController()
+        self.settings = Settings(sound_dir="", output_volume=80, spotify_control_mode="linux_mpris")
+        self.interval_running = True
+        self._dependents = {}
+        self._tasks_by_id = {}
+
+    def close(self):
+        self.scheduler.shutdown()
+        self.zones.close()
+
+
+def run_policy(policy: str, missed: int, timeout: float) -> int:
+    """Nombre d'exécutions jouées après une veille couvrant `missed` déclenchements."""
+    host = CatchupHost(policy, play_seconds=0.05)
+    try:
+        t = Task(1, "intervalle", "cloche.wav", TaskType.AFTER_DURATION, PERIOD_S)
+        host._tasks_by_id = {t.id: t}
+        now = datetime.now()
+        # créneaux décalés d'un quart de période: aucun ne tombe pile sur `now`
+        anchor = now - timedelta(seconds=PERIOD_S * (missed + 5.25))
+        host.scheduler.sched.add_job(host._make_job(t, anchor), IntervalTrigger(seconds=PERIOD_S, start_date=anchor),
+                                     id=f"task_{t.id}")
+        # veille: l'horloge murale a avancé de `missed` périodes d'un coup
+        slept = PERIOD_S * missed
+        host.scheduler.on_clock_jump(ClockJump("suspend", slept, now - timedelta(seconds=slept), now))
+        deadline = time.monotonic() + timeout
+        last, stable_since = -1, time.monotonic()
+        while time.monotonic() < deadline:
+            n = len(host.history.records)
+            if n != last:
+                last, stable_since = n, time.monotonic()
+            elif time.monotonic() - stable_since > 0.5:
+                break
+            time.sleep(0.02)
+        return len(host.history.records)
+    finally:
+        host.close()
+
+
+def run(missed: int, timeout: float) -> bool:
+    expected = {"skip": 0, "once": 1, "all": min(missed, CATCHUP_MAX_RUNS)}
+    failures = 0
+    for policy, want in expected.items():
+        got = run_policy(policy, missed, timeout)
+        ok = got == want
+        failures += 0 if ok else 1
+        print(f"{'OK   ' if ok else 'ÉCHEC'} politique {policy!r}: {got} exécution(s) jouée(s)"
+              + ("" if ok else f" (attendu {want})"))
+    print("OK: rattrapage conforme" if not failures else f"ÉCHEC: {failures} politique(s)")
+    return not failures
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m app.catchup_check", description=__doc__.splitlines()[0])
+    ap.add_argument("--missed", type=int, default=6, help="déclenchements manqués pendant la veille")
+    ap.add_argument("--timeout", type=float, default=10.0, help="attente max par politique (s)")
+    args = ap.parse_args(argv)
+    sys.exit(0 if run(args.missed, args.timeout) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# ==============================
+# app/clock.py
+# ==============================
+from __future__ import annotations
+import threading
+from datetime import datetime, timedelta
+
+
+class SystemClock:
+    """Horloge réelle (utilisée par l'application)."""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+
+class VirtualClock:
+    """Horloge simulée: le temps n'avance que via `sleep` / `advance_to`."""
+
+    def __init__(self, start: datetime | None = None):
+        self._now = start or datetime.now().replace(microsecond=0)
+        self._lock = threading.Lock()
+
+    def now(self) -> datetime:
+        with self._lock:
+            return self._now
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            with self._lock:
+                self._now += timedelta(seconds=seconds)
+
+    def advance_to(self, when: datetime):
+        with self._lock:
+            if when > self._now:
+                self._now = when
+
+
+SYSTEM_CLOCK = SystemClock()
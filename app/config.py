@@ -11,7 +11,15 @@ HOME = Path.home()
 APP_DIR = HOME/ f".{APP_NAME}"
 DB_PATH = APP_DIR/"app.db"
 LOG_PATH = APP_DIR/"app.log"
+SOUND_CACHE_PATH = APP_DIR/"sounds.db"  # métadonnées et formes d'onde (reconstructible)
 DEFAULT_SOUND_DIR = APP_DIR/"sounds"
 
+# Historique des exécutions
+HISTORY_RETENTION_DAYS = 30     # lignes brutes (table runs)
+STATS_RETENTION_DAYS = 365      # agrégats journaliers (run_stats / run_latency)
+HISTORY_FLUSH_SECONDS = 5.0     # délai max avant écriture d'un lot
+HISTORY_BATCH_SIZE = 50         # écriture anticipée si le tampon atteint cette taille
+COUNTERS_FLUSH_SECONDS = 30.0   # compteurs d'occurrences: écriture différée (cf. history.RunCounters)
+
 APP_DIR.mkdir(parents=True, exist_ok=True)
 DEFAULT_SOUND_DIR.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,177 @@
+# ==============================
+# app/history.py
+# ==============================
+from __future__ import annotations
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+from .config import (COUNTERS_FLUSH_SECONDS, HISTORY_BATCH_SIZE, HISTORY_FLUSH_SECONDS,
+                     HISTORY_RETENTION_DAYS, STATS_RETENTION_DAYS)
+from .models import RunRecord, Task
+
+if TYPE_CHECKING:
+    from .storage import Storage
+
+log = logging.getLogger("SoundsScheduler")
+
+# Bornes supérieures (ms) des classes de l'histogramme de latence; la dernière classe est "au-delà"
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2000, 5000, 10000, 30000, 60000]
+# Une exécution est "à l'heure" si elle démarre au plus ON_TIME_MS après l'heure prévue
+ON_TIME_MS = 2000
+
+def latency_bucket(latency_ms: int) -> int:
+    for i, bound in enumerate(LATENCY_BUCKETS_MS):
+        if latency_ms <= bound:
+            return i
+    return len(LATENCY_BUCKETS_MS)
+
+def percentile_from_histogram(histogram: List[int], pct: float) -> Optional[int]:
+    """Percentile approché (borne supérieure de la classe), None si aucune donnée / au-delà de la dernière borne."""
+    total = sum(histogram)
+    if total <= 0:
+        return None
+    rank = pct / 100.0 * total
+    acc = 0
+    for i, n in enumerate(histogram):
+        acc += n
+        if acc >= rank and n:
+            return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else None
+    return None
+
+
+class RunHistoryWriter:
+    """Tampon d'écriture de l'historique: les exécutions sont écrites par lots depuis un thread dédié.
+
+    Un lot est écrit toutes les HISTORY_FLUSH_SECONDS ou dès que HISTORY_BATCH_SIZE lignes sont en attente.
+    La rétention (purge) est appliquée au démarrage puis une fois par jour.
+    """
+
+    def __init__(self, storage: Storage, flush_seconds: float = HISTORY_FLUSH_SECONDS, batch_size: int = HISTORY_BATCH_SIZE):
+        self.storage = storage
+        self.flush_seconds = flush_seconds
+        self.batch_size = max(1, int(batch_size))
+        self._buf: List[RunRecord] = []
+        self._buf_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._last_purge = 0.0
+        self._thread = threading.Thread(target=self._loop, name="run-history", daemon=True)
+        self._thread.start()
+
+    def record(self, rec: RunRecord):
+        with self._buf_lock:
+            self._buf.append(rec)
+            full = len(self._buf) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        with self._buf_lock:
+            batch, self._buf = self._buf, []
+        if not batch:
+            return
+        try:
+            self.storage.add_runs(batch)
+        except Exception:
+            log.exception("Écriture de l'historique échouée (%d lignes perdues)", len(batch))
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def _purge_if_due(self):
+        if time.monotonic() - self._last_purge < 86400 and self._last_purge:
+            return
+        self._last_purge = time.monotonic()
+        try:
+            self.storage.purge_runs(HISTORY_RETENTION_DAYS, STATS_RETENTION_DAYS)
+        except Exception:
+            log.exception("Purge de l'historique échouée")
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._purge_if_due()
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+
+class RunCounters:
+    """Compteurs d'occurrences en mémoire, écrits en différé dans tasks.run_count.
+
+    La mémoire fait foi pour la limite `max_occurrences`: `increment` compte et décide
+    sans accès disque. Les valeurs (absolues, donc rejouables) sont écrites en un lot
+    toutes les `flush_seconds`, avant chaque relecture des tâches et à la fermeture.
+
+    En cas d'arrêt brutal, au plus `flush_seconds` d'incréments sont perdus: la tâche
+    peut alors rejouer quelques occurrences au-delà de sa limite, jamais moins.
+    L'atteinte de la limite (désactivation) est écrite immédiatement: une tâche
+    terminée le reste même après un plantage.
+    """
+
+    def __init__(self, storage: Storage, flush_seconds: float = COUNTERS_FLUSH_SECONDS):
+        self.storage = storage
+        self.flush_seconds = flush_seconds
+        self._counts: Dict[int, int] = {}
+        self._dirty: Set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="run-counters", daemon=True)
+        self._thread.start()
+
+    def load(self, tasks: Iterable[Task]):
+        """Reprend les valeurs relues en base, sauf les incréments pas encore écrits."""
+        with self._lock:
+            fresh = {t.id: t.run_count or 0 for t in tasks}
+            self._dirty &= fresh.keys()         # tâches supprimées: rien à écrire
+            for task_id in self._dirty:
+                fresh[task_id] = self._counts[task_id]
+            self._counts = fresh
+
+    def increment(self, t: Task) -> Tuple[int, bool]:
+        """Compte une exécution; renvoie (valeur, limite atteinte)."""
+        with self._lock:
+            count = self._counts.get(t.id, t.run_count or 0) + 1
+            self._counts[t.id] = count
+            self._dirty.add(t.id)
+        reached = bool(t.max_occurrences) and count >= t.max_occurrences
+        if reached:
+            self.flush(disable=[t.id])
+        return count, reached
+
+    def reset(self, task_ids: Iterable[int]):
+        """Remet à 0 les compteurs déjà remis à 0 en base (réactivation d'une tâche terminée)."""
+        with self._lock:
+            for task_id in task_ids:
+                self._counts[task_id] = 0
+                self._dirty.discard(task_id)
+
+    def get(self, task_id: int) -> Optional[int]:
+        with self._lock:
+            return self._counts.get(task_id)
+
+    def flush(self, disable: Iterable[int] = ()):
+        with self._lock:
+            batch = {task_id: self._counts[task_id] for task_id in self._dirty}
+            self._dirty.clear()
+        disable = list(disable)
+        if not batch and not disable:
+            return
+        try:
+            self.storage.save_run_counts(batch, disable)
+        except Exception:
+            log.exception("Écriture des compteurs échouée (%d tâches)", len(batch))
+            with self._lock:
+                self._dirty.update(batch)       # nouvel essai au prochain lot
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def _loop(self):
+        while not self._stop.wait(self.flush_seconds):
+            self.flush()
@@ -0,0 +1,150 @@
+# ==============================
+# app/jobs.py
+# ==============================
+from __future__ import annotations
+import logging
+from datetime import datetime, timedelta
+from typing import List
+from .audio_player import PlaybackError, PlaybackTimeout
+from .clock import SYSTEM_CLOCK
+from .models import TaskType, Task, RunRecord
+
+log = logging.getLogger("SoundsScheduler")
+
+
+class JobsMixin:
+    """Construction et planification des jobs d'une tâche, sans dépendance à Qt.
+
+    La classe hôte fournit: `storage`, `scheduler`, `history`, `counters`, `player` (ou `zones`),
+    `media`, `settings`, `interval_running` et `_dependents` (id source -> tâches AFTER_TASK),
+    et éventuellement `sound_meta` (durées connues, pour le chien de garde de lecture).
+    MainWindow l'utilise pour l'application; le harnais d'endurance (app/soak.py)
+    et le simulateur (app/simulation.py) l'utilisent avec des doublures et une
+    horloge virtuelle (`clock`).
+    """
+
+    clock = SYSTEM_CLOCK
+
+    def _scheduled_time(self, t: Task, anchor: datetime | None, now: datetime) -> datetime:
+        """Heure prévue de l'exécution en cours (pour l'historique / la latence)."""
+        if t.task_type == TaskType.FIXED_TIME:
+            due = now.replace(hour=t.at_hour or 0, minute=t.at_minute or 0, second=0, microsecond=0)
+            return due if due <= now else due - timedelta(days=1)
+        if anchor is None:
+            return now
+        if t.task_type == TaskType.AFTER_DURATION and anchor <= now:
+            # les déclenchements d'un IntervalTrigger tombent sur anchor + k * période
+            period = max(1, int(t.param_value))
+            k = int((now - anchor).total_seconds() // period)
+            return anchor + timedelta(seconds=k * period)
+        return anchor
+
+    def _player_for(self, t: Task):
+        """ZonePlayer de la tâche (hôte avec `zones`, exécution confiée à sa file), sinon le lecteur unique `player`."""
+        zones = getattr(self, "zones", None)
+        return zones.get(t.zone) if zones is not None else self.player
+
+    def _expected_duration(self, t: Task):
+        meta = getattr(self, "sound_meta", None)
+        return meta.duration_of(t.sound_path) if meta is not None else None
+
+    def _rebuild_job(self, task_id: int, anchor: datetime):
+        """Job d'une tâche réancrée (saut d'horloge, cf. TaskScheduler.job_factory)."""
+        t = self._tasks_by_id.get(task_id)
+        return self._make_job(t, anchor) if t is not None else None
+
+    def _make_job(self, t: Task, anchor: datetime | None = None):
+        def job(run_key=None):
+            # heure prévue calculée au déclenchement: l'attente dans la file de la zone compte en latence
+            scheduled = self._scheduled_time(t, anchor, self.clock.now())
+            target = self._player_for(t)
+            submit = getattr(target, "submit", None)
+            if submit is None:
+                run(target, scheduled)      # lecteur unique (harnais, simulateur): exécution directe
+            # run_key: clé propre à chaque rattrapage (politique "all"), sinon l'id de la tâche
+            elif not submit(run_key or t.id, lambda: run(target.player, scheduled)):
+                log.warning("Tâche #%s: exécution précédente encore en file dans la zone '%s' — ignorée",
+                            t.id, target.name or "défaut")
+
+        def run(player, scheduled: datetime):
+            """Exécution complète (dans le worker de la zone): annonce, historique, occurrences, dépendantes."""
+            started = self.clock.now()      # repris juste avant la lecture, cf. plus bas
+            log.info("Exécution tâche #%s (%s) — son=%s", t.id, t.task_type.value, t.sound_path)
+            outcome = "error"
+            media = self.media
+            was_playing = False
+            try:
+                try:
+                    was_playing = media.duck_all(800)
+                except Exception:
+                    # contrôle des lecteurs en échec: l'annonce doit quand même être jouée
+                    log.exception("Tâche #%s: impossible de baisser les lecteurs", t.id)
+                player.set_volume(self.settings.output_volume)
+                # début réel de l'annonce: après le fondu des lecteurs, la latence l'inclut
+                started = self.clock.now()
+                try:
+                    player.play_blocking(t.sound_path, self._expected_duration(t))
+                    outcome = "ok"
+                except PlaybackTimeout as e:
+                    # son coupé par le chien de garde: le worker est libéré, la chaîne continue
+                    outcome = "timeout"
+                    log.warning("Tâche #%s: lecture interrompue (%s) — son=%s", t.id, e, t.sound_path)
+                except PlaybackError as e:
+                    # fichier illisible: enregistré en erreur, la chaîne continue comme après une coupure
+                    log.warning("Tâche #%s: son non joué (%s)", t.id, e)
+            finally:
+                log.info("Fin tâche #%s", t.id)
+                if was_playing:
+                    try:
+                        media.restore_all(800)
+                    except Exception:
+                        log.exception("Tâche #%s: restauration des lecteurs en échec", t.id)
+                self.history.record(RunRecord(t.id, scheduled, started, self.clock.now(), outcome))
+
+            # occurrences
+            if t.max_occurrences and t.max_occurrences > 0 and t.task_type == TaskType.AFTER_DURATION:
+                _count, reached = self.counters.increment(t)
+                if reached:
+                    self.scheduler.remove(t.id)
+
+            # déclenche les dépendants
+            for dep in self._dependents.get(t.id, []):
+                run_date = self.clock.now() + timedelta(seconds=max(0, int(dep.param_value)))
+                log.info("  -> planifie dépendante #%s pour %s (+%ss)", dep.id, run_date, int(dep.param_value))
+                self.scheduler.schedule_once_at(dep.id, run_date, self._make_job(dep, run_date))
+        return job
+
+    def _schedule_all(self, tasks: List[Task]):
+        """Purge les jobs puis planifie toutes les tâches actives qui ne dépendent pas d'une autre."""
+        # rebuild schedules
+        self.scheduler.clear()
+        log.info("Jobs APScheduler purgés. Replanifie…")
+        # index for dependencies
+        dependents = {}
+        for t in tasks:
+            if t.enabled and t.task_type == TaskType.AFTER_TASK and t.after_task_id:
+                dependents.setdefault(t.after_task_id, []).append(t)
+        self._tasks_by_id = {t.id: t for t in tasks}
+        self._dependents = dependents
+        # schedule non-dependent tasks
+        for t in tasks:
+            if not t.enabled:
+                continue
+            if t.task_type == TaskType.AFTER_TASK:
+                continue  # sera déclenchée par sa source
+            if t.task_type == TaskType.AFTER_DURATION and not self.interval_running:
+                log.info("(attente) AFTER_DURATION #%s — démarrage manuel requis", t.id)
+                continue
+            self._schedule_task(t)
+        log.info("Planification terminée (%d tâches actives)", sum(1 for t in tasks if t.enabled))
+
+    def _schedule_task(self, t: Task):
+        if t.task_type == TaskType.FIXED_TIME:
+            log.info("Planifie FIXED_TIME #%s à %02d:%02d", t.id, t.at_hour or 0, t.at_minute or 0)
+            self.scheduler.schedule_daily_fixed(t.id, t.at_hour or 0, t.at_minute or 0, self._make_job(t))
+            return
+        if t.task_type == TaskType.AFTER_DURATION:
+            # Démarrage manuel : première exécution après la durée depuis le clic « Démarrer »
+            next_run = self.clock.now() + timedelta(seconds=max(1, int(t.param_value)))
+            log.info("Planifie AFTER_DURATION #%s toutes %ss (prochaine: %s)", t.id, int(t.param_value), next_run)
+            self.scheduler.schedule_every_seconds(t.id, max(1, int(t.param_value)), self._make_job(t, next_run), next_run_time=next_run)
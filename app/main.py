@@ -5,15 +5,22 @@ from __future__ import annotations
 import sys
 import logging
 import threading
-from datetime import datetime, timedelta
 from pathlib import Path
 from PySide6 import QtWidgets, QtCore
 from .config import LOG_PATH
 from .storage import Storage
 from .models import TaskType, Task
-from .scheduler import TaskScheduler
+from .history import RunCounters, RunHistoryWriter, percentile_from_histogram
+from .utils import scan_sound_files
+from .sound_meta import SoundMetaCache, describe, format_duration
+from .workers import TaskRunner
+from .jobs import JobsMixin
+from .scheduler import CATCHUP_POLICIES, TaskScheduler
 from .spotify_control import SpotifyController
-from .audio_player import AudioPlayer
+from .mpris import MprisWatcher
+from .media_control import MediaPlayersController
+from .audio_player import AUDIO_BACKENDS
+from .zones import CLOSE_TIMEOUT_S, ZoneRouter, parse_zones, format_zones
 from .ui.add_task_dialog import AddTaskDialog
 from .ui.icons import get_app_icon
 
@@ -33,7 +40,7 @@ logging.basicConfig(
 )
 log = logging.getLogger("SoundsScheduler")
 
-class MainWindow(QtWidgets.QMainWindow):
+class MainWindow(JobsMixin, QtWidgets.QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("SoundsScheduler")
@@ -41,23 +48,45 @@ class MainWindow(QtWidgets.QMainWindow):
         self.resize(980, 560)
 
         self.storage = Storage()
+        self.history = RunHistoryWriter(self.storage)
+        self.counters = RunCounters(self.storage)
         self.scheduler = TaskScheduler()
-        self.player = AudioPlayer()
         self.settings = self.storage.load_settings()
-        self.spotify = SpotifyController(mode=self.settings.spotify_control_mode)
+        self.sound_meta = SoundMetaCache()
+        self.scheduler.catchup_policy = self.settings.catchup_policy
+        self.scheduler.job_factory = self._rebuild_job
+        # une sortie (lecteur + worker) par zone; `player` = zone par défaut
+        self.zones = ZoneRouter(self.settings.audio_backend, self.settings.zones)
+        self.player = self.zones.default
+        self.mpris = MprisWatcher()
+        self.mpris.start()
+        self.spotify = SpotifyController(mode=self.settings.spotify_control_mode, watcher=self.mpris)
+        self.media = self._make_media_controller()
 
         # state: manual start for AFTER_DURATION
         self.interval_running = False
 
+        # caches alimentés par les workers (lus par l'UI sans accès disque)
+        self.runner = TaskRunner(self)
+        self._tasks_by_id = {}
+        self._dependents = {}
+        self._sound_files = []
+        self._existing_task_sounds = []
+        self._pending_select = None
+
         self._init_ui()
+        self.runner.busy_changed.connect(self._on_busy_changed)
         self._load_settings_to_ui()
+        self._report_audio_problems()
         self._apply_theme(self.settings.theme)
         log.info("App démarrée. Chargement des tâches…")
+        self._rescan_sounds()
         self._reload_tasks()
 
     def _init_ui(self):
         tabs = QtWidgets.QTabWidget()
         self.setCentralWidget(tabs)
+        self.tabs = tabs
 
         # Settings tab
         settings_tab = QtWidgets.QWidget(); tabs.addTab(settings_tab, "Réglages")
@@ -70,6 +99,16 @@ class MainWindow(QtWidgets.QMainWindow):
         self.volume_slider = QtWidgets.QSlider(QtCore.Qt.Horizontal); self.volume_slider.setRange(0,100)
         s_layout.addRow("Volume de sortie", self.volume_slider)
 
+        self.backend_combo = QtWidgets.QComboBox()
+        self.backend_combo.addItems(["VLC", "PCM pré-décodé (faible latence)", "Aucune (test)"])  # vlc, pcm, null
+        s_layout.addRow("Moteur audio", self.backend_combo)
+
+        self.zones_edit = QtWidgets.QPlainTextEdit(); self.zones_edit.setMaximumHeight(80)
+        self.zones_edit.setPlaceholderText("une zone par ligne: nom = périphérique\nex: extérieur = hw:1,0")
+        btn_devices = QtWidgets.QPushButton("Périphériques…"); btn_devices.clicked.connect(self._show_devices)
+        zones_row = QtWidgets.QHBoxLayout(); zones_row.addWidget(self.zones_edit); zones_row.addWidget(btn_devices)
+        s_layout.addRow("Zones", self._wrap(zones_row))
+
         btn_save = QtWidgets.QPushButton("Enregistrer les réglages")
         btn_save.clicked.connect(self._save_settings)
         s_layout.addRow("", btn_save)
@@ -89,9 +128,23 @@ class MainWindow(QtWidgets.QMainWindow):
         sp_controls.addWidget(btn_sp_play); sp_controls.addWidget(btn_sp_pause)
         s_layout.addRow("Spotify", self._wrap(sp_controls))
 
+        # Lecteurs MPRIS coupés pendant les annonces
+        self.players_include_edit = QtWidgets.QLineEdit(); self.players_include_edit.setPlaceholderText("tous (ex: spotify, vlc, firefox)")
+        self.players_exclude_edit = QtWidgets.QLineEdit(); self.players_exclude_edit.setPlaceholderText("aucun")
+        self.players_action_combo = QtWidgets.QComboBox()
+        self.players_action_combo.addItems(["Pause (fondu)", "Baisser le volume"])  # pause, duck
+        s_layout.addRow("Lecteurs inclus", self.players_include_edit)
+        s_layout.addRow("Lecteurs exclus", self.players_exclude_edit)
+        s_layout.addRow("Pendant une annonce", self.players_action_combo)
+
+        # Déclenchements manqués pendant une mise en veille
+        self.catchup_combo = QtWidgets.QComboBox()
+        self.catchup_combo.addItems(["Ignorer", "Jouer une fois", "Tout rejouer"])  # skip, once, all
+        s_layout.addRow("Après une veille", self.catchup_combo)
+
         # Manual play sound
         manual_layout = QtWidgets.QHBoxLayout()
-        self.manual_sound_combo = QtWidgets.QComboBox(); self._refresh_manual_sounds()
+        self.manual_sound_combo = QtWidgets.QComboBox()
         btn_manual_play = QtWidgets.QPushButton("Lancer le son maintenant")
         btn_manual_play.clicked.connect(self._play_manual_sound)
         manual_layout.addWidget(self.manual_sound_combo); manual_layout.addWidget(btn_manual_play)
@@ -111,9 +164,12 @@ class MainWindow(QtWidgets.QMainWindow):
         # Tasks tab
         tasks_tab = QtWidgets.QWidget(); tabs.addTab(tasks_tab, "Tâches")
         v = QtWidgets.QVBoxLayout(tasks_tab)
-        self.table = QtWidgets.QTableWidget(0, 10)
-        self.table.setHorizontalHeaderLabels(["ID","Nom","Son","Type","Durée","Heure","Actif","MaxOcc","Start","Après#"])
+        self.table = QtWidgets.QTableWidget(0, 12)
+        self.table.setHorizontalHeaderLabels(["ID","Nom","Son","Type","Durée","Heure","Actif","MaxOcc","Start","Après#","Zone","Longueur"])
         self.table.horizontalHeader().setStretchLastSection(True)
+        # sélection de plusieurs lignes (Ctrl/Maj) pour les actions groupées
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         v.addWidget(self.table)
 
         actions = QtWidgets.QHBoxLayout()
@@ -121,8 +177,44 @@ class MainWindow(QtWidgets.QMainWindow):
         btn_edit = QtWidgets.QPushButton("Modifier"); btn_edit.clicked.connect(self._edit_selected)
         btn_del = QtWidgets.QPushButton("Supprimer"); btn_del.clicked.connect(self._delete_selected)
         actions.addWidget(btn_add); actions.addWidget(btn_edit); actions.addWidget(btn_del); actions.addStretch(1)
+        # actions groupées sur la sélection
+        btn_enable = QtWidgets.QPushButton("Activer"); btn_enable.clicked.connect(lambda: self._bulk_set_enabled(True))
+        btn_disable = QtWidgets.QPushButton("Désactiver"); btn_disable.clicked.connect(lambda: self._bulk_set_enabled(False))
+        btn_sound = QtWidgets.QPushButton("Changer le son…"); btn_sound.clicked.connect(self._bulk_change_sound)
+        btn_shift = QtWidgets.QPushButton("Décaler l'heure…"); btn_shift.clicked.connect(self._bulk_shift_time)
+        for b in (btn_enable, btn_disable, btn_sound, btn_shift):
+            actions.addWidget(b)
         v.addLayout(actions)
 
+        # Statistics tab (lit uniquement les agrégats journaliers)
+        stats_tab = QtWidgets.QWidget(); tabs.addTab(stats_tab, "Statistiques")
+        sv = QtWidgets.QVBoxLayout(stats_tab)
+        stats_bar = QtWidgets.QHBoxLayout()
+        self.stats_period_combo = QtWidgets.QComboBox()
+        for label, days in (("Aujourd'hui", 1), ("7 jours", 7), ("30 jours", 30), ("365 jours", 365)):
+            self.stats_period_combo.addItem(label, days)
+        self.stats_period_combo.setCurrentIndex(1)
+        self.stats_period_combo.currentIndexChanged.connect(self._refresh_stats)
+        btn_stats = QtWidgets.QPushButton("Actualiser"); btn_stats.clicked.connect(self._refresh_stats)
+        stats_bar.addWidget(QtWidgets.QLabel("Période")); stats_bar.addWidget(self.stats_period_combo)
+        stats_bar.addWidget(btn_stats); stats_bar.addStretch(1)
+        sv.addLayout(stats_bar)
+        self.stats_table = QtWidgets.QTableWidget(0, 10)
+        self.stats_table.setHorizontalHeaderLabels(["ID","Nom","Exécutions","À l'heure","Erreurs","Coupés","Latence moy.","p50","p95","p99"])
+        self.stats_table.horizontalHeader().setStretchLastSection(True)
+        sv.addWidget(self.stats_table)
+        tabs.currentChanged.connect(lambda i: self._refresh_stats() if tabs.widget(i) is stats_tab else None)
+
+        # Progression des opérations en arrière-plan
+        self.busy_label = QtWidgets.QLabel()
+        self.busy_bar = QtWidgets.QProgressBar(); self.busy_bar.setRange(0, 0); self.busy_bar.setMaximumWidth(160)
+        self.busy_bar.setVisible(False)
+        self.statusBar().addWidget(self.busy_label, 1)
+        self.statusBar().addPermanentWidget(self.busy_bar)
+        # moteur audio absent / remplacé: visible en permanence, pas seulement dans le journal
+        self.audio_label = QtWidgets.QLabel(); self.audio_label.setStyleSheet("color: #c0392b;")
+        self.statusBar().addPermanentWidget(self.audio_label)
+
     def _wrap(self, layout):
         w = QtWidgets.QWidget(); w.setLayout(layout); return w
 
@@ -130,127 +222,252 @@ class MainWindow(QtWidgets.QMainWindow):
         d = QtWidgets.QFileDialog.getExistingDirectory(self, "Choisir le dossier des sons", self.sound_dir_edit.text() or str(Path.home()/"Music"))
         if d:
             self.sound_dir_edit.setText(d)
-            self._refresh_manual_sounds()
+            self._rescan_sounds()
+
+    # --- background work (stockage, scan, planification hors du thread GUI)
+    def _on_busy_changed(self, pending: int, label: str):
+        self.busy_label.setText(label if pending else "")
+        self.busy_bar.setVisible(pending > 0)
+
+    def _on_worker_error(self, msg: str):
+        QtWidgets.QMessageBox.warning(self, "Erreur", msg)
 
-    def _refresh_manual_sounds(self):
-        p = Path(self.sound_dir_edit.text() or str(Path.home()/"Music"))
-        from_dir = [str(fp) for fp in p.glob("**/*") if fp.suffix.lower() in {".mp3", ".wav", ".ogg", ".flac", ".aac", ".m4a"}]
+    def _rescan_sounds(self):
+        sound_dir = self.sound_dir_edit.text() or str(Path.home()/"Music")
+        self.runner.submit_background(scan_sound_files, sound_dir, with_progress=True,
+                                      on_done=self._on_sounds_scanned, label="Analyse des sons…")
+
+    def _on_sounds_scanned(self, files: list):
+        self._sound_files = files
+        self._refresh_manual_sounds()
+
+    def _refresh_manual_sounds(self, select: str | None = None):
+        """Met à jour la liste manuelle depuis les caches (aucun accès disque ici)."""
         # inclure aussi tous les sons référencés par les tâches existantes
-        try:
-            task_paths = [t.sound_path for t in self.storage.list_tasks() if t.sound_path]
-        except Exception:
-            task_paths = []
+        task_paths = list(self._existing_task_sounds)
         # merge + dédoublonnage en préservant l'ordre (tâches d'abord)
         seen = set()
         merged = []
-        for path in (task_paths + from_dir):
+        for path in (task_paths + self._sound_files):
             if not path:
                 continue
             if path in seen:
                 continue
             seen.add(path)
             merged.append(path)
-        # garder uniquement les fichiers qui existent
-        merged = [s for s in merged if Path(s).exists()]
         # préserver la sélection si possible
-        current = self.manual_sound_combo.currentText() if self.manual_sound_combo.count() else None
+        current = select or (self.manual_sound_combo.currentText() if self.manual_sound_combo.count() else None)
         self.manual_sound_combo.clear()
         self.manual_sound_combo.addItems(merged)
         if current and current in merged:
             self.manual_sound_combo.setCurrentText(current)
+        self._apply_sound_meta()
+        # analyse des sons nouveaux ou modifiés (pool de processus, hors du thread GUI)
+        self.runner.submit_background(self.sound_meta.refresh, merged, with_progress=True,
+                                      on_done=self._on_sound_meta, label="Analyse audio…")
+
+    def _on_sound_meta(self, new_infos: list):
+        if new_infos:
+            self._apply_sound_meta()
+
+    def _apply_sound_meta(self):
+        """Infobulles et longueurs depuis le cache en mémoire (aucun décodage ici)."""
+        for i in range(self.manual_sound_combo.count()):
+            info = self.sound_meta.get(self.manual_sound_combo.itemText(i))
+            self.manual_sound_combo.setItemData(i, describe(info), QtCore.Qt.ToolTipRole)
+        for row in range(self.table.rowCount()):
+            item = self.table.item(row, 2)
+            if item is not None:
+                self._set_sound_cells(row, item.text())
+
+    def _set_sound_cells(self, row: int, path: str):
+        info = self.sound_meta.get(path)
+        self.table.item(row, 2).setToolTip(describe(info))
+        length = format_duration(info.duration) if info is not None and info.duration is not None else "-"
+        self.table.setItem(row, 11, QtWidgets.QTableWidgetItem(length))
 
     def _save_settings(self):
+        old_dir = self.settings.sound_dir
         self.settings.sound_dir = self.sound_dir_edit.text().strip() or self.settings.sound_dir
         self.settings.output_volume = self.volume_slider.value()
         self.settings.spotify_control_mode = "linux_mpris"
         idx = self.theme_combo.currentIndex()
         self.settings.theme = {0: "system", 1: "light", 2: "dark"}.get(idx, "system")
-        self.storage.save_settings(self.settings)
+        self.settings.players_include = self.players_include_edit.text().strip()
+        self.settings.players_exclude = self.players_exclude_edit.text().strip()
+        self.settings.players_action = "duck" if self.players_action_combo.currentIndex() == 1 else "pause"
+        # reconfiguré sur place: une annonce en cours garde son compteur de coupure
+        self.media.configure(self.settings.players_include, self.settings.players_exclude, self.settings.players_action)
+        self.settings.catchup_policy = CATCHUP_POLICIES[max(0, self.catchup_combo.currentIndex())]
+        self.scheduler.catchup_policy = self.settings.catchup_policy
+        backend = AUDIO_BACKENDS[self.backend_combo.currentIndex()] if self.backend_combo.currentIndex() >= 0 else "vlc"
+        zones = parse_zones(self.zones_edit.toPlainText())
+        if backend != self.settings.audio_backend or zones != self.settings.zones:
+            self.settings.audio_backend = backend
+            self.settings.zones = zones
+            # une Instance VLC / un flux PortAudio par zone: ouverture hors du thread GUI
+            self.runner.submit(ZoneRouter, backend, zones, label="Ouverture des sorties audio…",
+                               on_done=self._swap_zones, on_error=self._on_worker_error)
         self._apply_theme(self.settings.theme)
-        self.player.set_volume(self.settings.output_volume)
-        self.spotify = SpotifyController(mode=self.settings.spotify_control_mode)
-        QtWidgets.QMessageBox.information(self, "Réglages", "Enregistrés.")
+        self.zones.set_volume(self.settings.output_volume)
+        self.spotify = SpotifyController(mode=self.settings.spotify_control_mode, watcher=self.mpris)
+        if self.settings.sound_dir != old_dir:
+            self._rescan_sounds()
+        self.runner.submit(self.storage.save_settings, self.settings, label="Enregistrement des réglages…",
+                           on_done=lambda _: QtWidgets.QMessageBox.information(self, "Réglages", "Enregistrés."),
+                           on_error=self._on_worker_error)
 
     def _load_settings_to_ui(self):
         self.sound_dir_edit.setText(self.settings.sound_dir)
         self.volume_slider.setValue(self.settings.output_volume)
-        self.player.set_volume(self.settings.output_volume)
+        self.zones.set_volume(self.settings.output_volume)
         theme_to_idx = {"system": 0, "light": 1, "dark": 2}
         self.theme_combo.setCurrentIndex(theme_to_idx.get(getattr(self.settings, "theme", "system"), 0))
+        self.players_include_edit.setText(self.settings.players_include)
+        self.players_exclude_edit.setText(self.settings.players_exclude)
+        self.players_action_combo.setCurrentIndex(1 if self.settings.players_action == "duck" else 0)
+        self.backend_combo.setCurrentIndex(AUDIO_BACKENDS.index(self.settings.audio_backend)
+                                           if self.settings.audio_backend in AUDIO_BACKENDS else 0)
+        self.zones_edit.setPlainText(format_zones(self.settings.zones))
+        self.catchup_combo.setCurrentIndex(CATCHUP_POLICIES.index(self.settings.catchup_policy)
+                                           if self.settings.catchup_policy in CATCHUP_POLICIES else 1)
+
+    def _swap_zones(self, router: ZoneRouter):
+        old_zones, self.zones = self.zones, router
+        self.player = self.zones.default
+        self.zones.set_volume(self.settings.output_volume)
+        # les sons en cours se terminent sur l'ancien routeur, libéré ensuite sur ses propres threads
+        old_zones.close()
+        if self.settings.audio_backend == "pcm":
+            self.runner.submit_background(self.zones.preload, list(self._tasks_by_id.values()), label="Préchargement des sons…")
+        self._report_audio_problems()
+
+    def _report_audio_problems(self):
+        problems = self.zones.problems()
+        self.audio_label.setText("⚠ " + problems[0] if problems else "")
+        self.audio_label.setToolTip("\n".join(problems))
+        if problems:
+            QtWidgets.QMessageBox.warning(self, "Moteur audio", "\n".join(problems))
+
+    def _show_devices(self):
+        def shown(devices):
+            text = "\n".join(f"{dev_id} — {desc}" for dev_id, desc in devices) or "Aucun périphérique listé par ce moteur audio."
+            QtWidgets.QMessageBox.information(self, "Périphériques de sortie", text)
+        self.runner.submit_background(self.player.list_devices, on_done=shown, on_error=self._on_worker_error)
+
+    def _make_media_controller(self) -> MediaPlayersController:
+        return MediaPlayersController(self.mpris, include=self.settings.players_include,
+                                      exclude=self.settings.players_exclude, action=self.settings.players_action)
 
 
     # --- Task CRUD + Scheduling
     def _add_task(self):
-        existing = self.storage.list_tasks()
-        dlg = AddTaskDialog(self, sound_dir=self.settings.sound_dir, existing_tasks=existing)
+        existing = list(self._tasks_by_id.values())
+        dlg = AddTaskDialog(self, existing_tasks=existing, sounds=self._sound_files, zones=self.zones.names(),
+                            sound_meta=self.sound_meta)
         if dlg.exec() == QtWidgets.QDialog.Accepted:
             t = dlg.get_task()
             t.name = t.name or Path(t.sound_path).stem
-            new_id = self.storage.add_task(t)
-            self._reload_tasks()
             # refresh manual list & select the newly added sound
-            self._refresh_manual_sounds()
-            if t.sound_path:
-                idx = self.manual_sound_combo.findText(t.sound_path)
-                if idx >= 0:
-                    self.manual_sound_combo.setCurrentIndex(idx)
+            self._pending_select = t.sound_path or None
+            self._reload_tasks(before=lambda: self.storage.add_task(t), label="Ajout de la tâche…")
 
     def _edit_selected(self):
         row = self.table.currentRow()
         if row < 0: return
         task_id = int(self.table.item(row, 0).text())
-        tasks = {t.id: t for t in self.storage.list_tasks()}
-        t = tasks.get(task_id)
+        t = self._tasks_by_id.get(task_id)
         if not t: return
-        existing = [x for x in tasks.values() if x.id != t.id]
-        dlg = AddTaskDialog(self, task=t, sound_dir=self.settings.sound_dir, existing_tasks=existing)
+        existing = [x for x in self._tasks_by_id.values() if x.id != t.id]
+        dlg = AddTaskDialog(self, task=t, existing_tasks=existing, sounds=self._sound_files, zones=self.zones.names(),
+                            sound_meta=self.sound_meta)
         if dlg.exec() == QtWidgets.QDialog.Accepted:
             new_t = dlg.get_task(); new_t.id = t.id
-            self.storage.update_task(new_t)
-            self._reload_tasks()
             # refresh manual list & keep/point to edited task sound
-            self._refresh_manual_sounds()
-            if new_t.sound_path:
-                idx = self.manual_sound_combo.findText(new_t.sound_path)
-                if idx >= 0:
-                    self.manual_sound_combo.setCurrentIndex(idx)
+            self._pending_select = new_t.sound_path or None
+            self._reload_tasks(before=lambda: self.storage.update_task(new_t), label="Modification de la tâche…")
 
     def _delete_selected(self):
-        row = self.table.currentRow()
-        if row < 0: return
-        task_id = int(self.table.item(row, 0).text())
-        self.storage.delete_task(task_id)
-        self.scheduler.remove(task_id)
-        self._reload_tasks()
-
-    def _reload_tasks(self):
+        ids = self._selected_task_ids()
+        if not ids: return
+        if len(ids) > 1:
+            answer = QtWidgets.QMessageBox.question(self, "Supprimer", f"Supprimer {len(ids)} tâches ?")
+            if answer != QtWidgets.QMessageBox.Yes:
+                return
+        def delete():
+            self.storage.delete_tasks(ids)
+            for task_id in ids:
+                self.scheduler.remove(task_id)
+        self._reload_tasks(before=delete, label="Suppression de la tâche…" if len(ids) == 1 else f"Suppression de {len(ids)} tâches…")
+
+    # --- actions groupées: une transaction Storage puis un seul rechargement/replanification
+    def _selected_task_ids(self) -> list[int]:
+        rows = sorted({i.row() for i in self.table.selectionModel().selectedRows()})
+        if not rows and self.table.currentRow() >= 0:
+            rows = [self.table.currentRow()]
+        return [int(self.table.item(r, 0).text()) for r in rows if self.table.item(r, 0)]
+
+    def _bulk_set_enabled(self, enabled: bool):
+        ids = self._selected_task_ids()
+        if not ids: return
+        self._reload_tasks(before=lambda: self.counters.reset(self.storage.set_enabled_many(ids, enabled)),
+                           label=f"{'Activation' if enabled else 'Désactivation'} de {len(ids)} tâche(s)…")
+
+    def _bulk_change_sound(self):
+        ids = self._selected_task_ids()
+        if not ids: return
+        sounds = [self.manual_sound_combo.itemText(i) for i in range(self.manual_sound_combo.count())]
+        path, ok = QtWidgets.QInputDialog.getItem(self, "Changer le son", f"Nouveau son pour {len(ids)} tâche(s)", sounds, 0, True)
+        if not ok or not path:
+            return
+        self._pending_select = path
+        self._reload_tasks(before=lambda: self.storage.set_sound_many(ids, path), label=f"Changement du son de {len(ids)} tâche(s)…")
+
+    def _bulk_shift_time(self):
+        ids = self._selected_task_ids()
+        if not ids: return
+        minutes, ok = QtWidgets.QInputDialog.getInt(
+            self, "Décaler l'heure", f"Décalage en minutes (heure fixe / heure de départ) pour {len(ids)} tâche(s)",
+            0, -1439, 1439)
+        if not ok or not minutes:
+            return
+        self._reload_tasks(before=lambda: self.storage.shift_times(ids, minutes), label=f"Décalage de {len(ids)} tâche(s)…")
+
+    def _reload_tasks(self, before=None, label: str = "Rechargement des tâches…"):
+        """Relit et replanifie les tâches en arrière-plan; `before` (écriture) s'exécute dans le même worker."""
+        def work():
+            # compteurs écrits avant la modification: une édition (run_count remis à 0) n'est pas écrasée ensuite
+            self.counters.flush()
+            if before:
+                before()
+            return self._load_and_schedule()
+        self.runner.submit(work, on_done=self._on_tasks_loaded, on_error=self._on_worker_error, label=label)
+
+    def _load_and_schedule(self):
+        # Exécuté dans le worker: lecture SQLite + planification APScheduler
         log.info("Rechargement des tâches…")
+        self.counters.flush()
         tasks = self.storage.list_tasks()
+        self.counters.load(tasks)
+        self._schedule_all(tasks)
+        # sons référencés par les tâches et encore présents sur le disque
+        existing_sounds = [t.sound_path for t in tasks if t.sound_path and Path(t.sound_path).exists()]
+        return tasks, existing_sounds
+
+    def _on_tasks_loaded(self, result):
+        tasks, existing_sounds = result
         # rebuild UI
+        self.table.setUpdatesEnabled(False)
         self.table.setRowCount(0)
         for t in tasks:
             self._append_task_row(t)
-        # rebuild schedules
-        self.scheduler.clear()
-        log.info("Jobs APScheduler purgés. Replanifie…")
-        # index for dependencies
-        self._tasks_by_id = {t.id: t for t in tasks}
-        self._dependents = {}
-        for t in tasks:
-            if t.enabled and t.task_type == TaskType.AFTER_TASK and t.after_task_id:
-                self._dependents.setdefault(t.after_task_id, []).append(t)
-        # schedule non-dependent tasks
-        for t in tasks:
-            if not t.enabled:
-                continue
-            if t.task_type == TaskType.AFTER_TASK:
-                continue  # sera déclenchée par sa source
-            if t.task_type == TaskType.AFTER_DURATION and not self.interval_running:
-                log.info("(attente) AFTER_DURATION #%s — démarrage manuel requis", t.id)
-                continue
-            self._schedule_task(t)
-        log.info("Planification terminée (%d tâches actives)", sum(1 for t in tasks if t.enabled))
-        log.info("Planification terminée (%d tâches actives)", sum(1 for t in tasks if t.enabled))
+        self.table.setUpdatesEnabled(True)
+        self._existing_task_sounds = existing_sounds
+        if self.settings.audio_backend == "pcm":
+            # décodage anticipé hors du thread GUI: la 1re lecture d'un son ne décode plus rien
+            self.runner.submit_background(self.zones.preload, tasks, label="Préchargement des sons…")
+        self._refresh_manual_sounds(select=self._pending_select)
+        self._pending_select = None
 
     def _append_task_row(self, t: Task):
         row = self.table.rowCount(); self.table.insertRow(row)
@@ -273,48 +490,33 @@ class MainWindow(QtWidgets.QMainWindow):
             start_txt = "now" if t.start_now else (f"{t.start_at_hour:02d}:{t.start_at_minute:02d}" if t.start_at_hour is not None else "-")
         setc(8, start_txt)
         setc(9, f"#{t.after_task_id}" if t.after_task_id else "-")
-        setc(9, f"#{t.after_task_id}" if t.after_task_id else "-")
-
-    # --- job builder & scheduling
-    def _make_job(self, t: Task):
-        def job():
-            log.info("Exécution tâche #%s (%s) — son=%s", t.id, t.task_type.value, t.sound_path)
-            was_playing = self.spotify.is_playing()
-            try:
-                if was_playing:
-                    self.spotify.fade_out_and_pause(800)
-                self.player.set_volume(self.settings.output_volume)
-                self.player.play_blocking(t.sound_path)
-            finally:
-                log.info("Fin tâche #%s", t.id)
-                if was_playing:
-                    self.spotify.play_and_fade_in(800)
-
-            # occurrences
-            if t.max_occurrences and t.max_occurrences > 0 and t.task_type == TaskType.AFTER_DURATION:
-                new_count = self.storage.increment_run_count(t.id)
-                if new_count >= t.max_occurrences:
-                    self.storage.set_enabled(t.id, False)
-                    self.scheduler.remove(t.id)
-
-            # déclenche les dépendants
-            for dep in self._dependents.get(t.id, []) if hasattr(self, "_dependents") else []:
-                run_date = datetime.now() + timedelta(seconds=max(0, int(dep.param_value)))
-                log.info("  -> planifie dépendante #%s pour %s (+%ss)", dep.id, run_date, int(dep.param_value))
-                self.scheduler.schedule_once_at(dep.id, run_date, self._make_job(dep))
-        return job
-
-    def _schedule_task(self, t: Task):
-        job = self._make_job(t)
-        if t.task_type == TaskType.FIXED_TIME:
-            log.info("Planifie FIXED_TIME #%s à %02d:%02d", t.id, t.at_hour or 0, t.at_minute or 0)
-            self.scheduler.schedule_daily_fixed(t.id, t.at_hour or 0, t.at_minute or 0, job)
-            return
-        if t.task_type == TaskType.AFTER_DURATION:
-            # Démarrage manuel : première exécution après la durée depuis le clic « Démarrer »
-            next_run = datetime.now() + timedelta(seconds=max(1, int(t.param_value)))
-            log.info("Planifie AFTER_DURATION #%s toutes %ss (prochaine: %s)", t.id, int(t.param_value), next_run)
-            self.scheduler.schedule_every_seconds(t.id, max(1, int(t.param_value)), job, next_run_time=next_run)
+        setc(10, t.zone or "défaut")
+        self._set_sound_cells(row, t.sound_path)
+
+    def _refresh_stats(self, *_):
+        days = self.stats_period_combo.currentData() or 7
+        self.runner.submit(self.storage.run_stats, days, on_done=self._show_stats, label="Calcul des statistiques…")
+
+    def _show_stats(self, stats: dict):
+        names = {t.id: t.name for t in self._tasks_by_id.values()}
+        self.stats_table.setRowCount(0)
+        for task_id in sorted(stats):
+            st = stats[task_id]
+            row = self.stats_table.rowCount(); self.stats_table.insertRow(row)
+            def setc(c, text):
+                self.stats_table.setItem(row, c, QtWidgets.QTableWidgetItem(text))
+            def pct_txt(p):
+                v = percentile_from_histogram(st["histogram"], p)
+                return f"≤ {v} ms" if v is not None else "> 60 s"
+            runs = st["runs"] or 0
+            setc(0, str(task_id))
+            setc(1, names.get(task_id, "?"))
+            setc(2, str(runs))
+            setc(3, f"{100.0 * st['on_time'] / runs:.1f} %" if runs else "-")
+            setc(4, str(st["errors"]))
+            setc(5, str(st["timeouts"]))
+            setc(6, f"{st['latency_sum_ms'] / runs:.0f} ms" if runs else "-")
+            setc(7, pct_txt(50)); setc(8, pct_txt(95)); setc(9, pct_txt(99))
 
     def _play_manual_sound(self):
         path = self.manual_sound_combo.currentText()
@@ -322,15 +524,14 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, "Son", "Aucun fichier sélectionné.")
             return
         def run():
-            was_playing = self.spotify.is_playing()
+            media = self.media
+            was_playing = media.duck_all(800)
             try:
-                if was_playing:
-                    self.spotify.fade_out_and_pause(800)
                 self.player.set_volume(self.settings.output_volume)
                 self.player.play_blocking(path)
             finally:
                 if was_playing:
-                    self.spotify.play_and_fade_in(800)
+                    media.restore_all(800)
         threading.Thread(target=run, daemon=True).start()
 
     # --- start/stop interval tasks (manual)
@@ -342,9 +543,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.btn_stop_tasks.setEnabled(True)
         log.info("[MANUAL] Démarrage des tâches AFTER_DURATION…")
         # replanifie uniquement les AFTER_DURATION manquantes
-        tasks = [t for t in self.storage.list_tasks() if t.enabled and t.task_type == TaskType.AFTER_DURATION]
-        for t in tasks:
-            self._schedule_task(t)
+        def work():
+            tasks = [t for t in self.storage.list_tasks() if t.enabled and t.task_type == TaskType.AFTER_DURATION]
+            for t in tasks:
+                self._schedule_task(t)
+        self.runner.submit(work, on_error=self._on_worker_error, label="Démarrage des tâches…")
 
     def _stop_interval_tasks(self):
         if not self.interval_running:
@@ -354,10 +557,24 @@ class MainWindow(QtWidgets.QMainWindow):
         self.btn_stop_tasks.setEnabled(False)
         log.info("[MANUAL] Arrêt des tâches AFTER_DURATION — déplanifie…")
         # supprime les jobs d'intervalle mais laisse les FIXED_TIME
-        tasks = [t for t in self.storage.list_tasks() if t.task_type == TaskType.AFTER_DURATION]
-        for t in tasks:
-            self.scheduler.remove(t.id)
+        def work():
+            tasks = [t for t in self.storage.list_tasks() if t.task_type == TaskType.AFTER_DURATION]
+            for t in tasks:
+                self.scheduler.remove(t.id)
+        self.runner.submit(work, on_error=self._on_worker_error, label="Arrêt des tâches…")
     
+    def closeEvent(self, event):
+        self.runner.wait()
+        self.scheduler.shutdown()
+        # son en cours coupé (fermeture sans gel de l'interface); attente bornée pour que
+        # son exécution soit encore écrite dans l'historique
+        self.zones.close(interrupt=True, timeout=CLOSE_TIMEOUT_S)
+        self.history.close()
+        self.counters.close()
+        self.sound_meta.close()
+        self.mpris.stop()
+        super().closeEvent(event)
+
     def _apply_theme(self, theme: str):
         qdt = _safe_import_qdarktheme()
         # reset style
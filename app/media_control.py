@@ -0,0 +1,158 @@
+# ==============================
+# app/media_control.py
+# ==============================
+from __future__ import annotations
+import logging
+import platform
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional
+from .mpris import MprisWatcher
+
+log = logging.getLogger("SoundsScheduler")
+
+DUCK_RATIO = 0.2        # en mode "duck", volume conservé pendant l'annonce (fraction du volume initial)
+
+def parse_player_list(text: str) -> List[str]:
+    """"spotify, vlc ,firefox" -> ["spotify", "vlc", "firefox"]"""
+    return [p.strip().lower() for p in (text or "").replace(";", ",").split(",") if p.strip()]
+
+
+class NullMediaController:
+    """Aucun lecteur externe à couper (harnais de test, simulation)."""
+
+    def duck_all(self, fade_ms: int = 800) -> bool:
+        return False
+
+    def restore_all(self, fade_ms: int = 800):
+        pass
+
+
+class MediaPlayersController:
+    """Baisse (ou met en pause) tous les lecteurs MPRIS actifs pendant une annonce, puis les restaure.
+
+    Les fondus de tous les lecteurs avancent sur une même ligne de temps: à chaque pas,
+    une commande playerctl est lancée pour chaque lecteur en parallèle. Chaque lecteur
+    retrouve ensuite son propre volume d'origine. Les annonces simultanées (zones) sont
+    comptées: seule la première coupe les lecteurs, seule la dernière les restaure.
+    """
+
+    def __init__(self, watcher: Optional[MprisWatcher] = None, include: str = "", exclude: str = "", action: str = "pause"):
+        self._watcher = watcher
+        self._saved: Dict[str, Optional[float]] = {}   # lecteur -> volume avant l'annonce
+        self._saved_action = "pause"                    # action appliquée par la coupure en cours
+        self._holders = 0                               # annonces en cours
+        self._lock = threading.Lock()
+        self.configure(include, exclude, action)
+
+    def configure(self, include: str = "", exclude: str = "", action: str = "pause"):
+        """Change les réglages sur place: une instance unique garde le compte des annonces en cours."""
+        with self._lock:
+            self.include = parse_player_list(include)
+            self.exclude = parse_player_list(exclude)
+            self.action = action if action in ("pause", "duck") else "pause"
+
+    # --- sélection des lecteurs
+    def allowed(self, name: str) -> bool:
+        base = name.split(".", 1)[0].lower()
+        if base in self.exclude or name.lower() in self.exclude:
+            return False
+        return not self.include or base in self.include or name.lower() in self.include
+
+    def playing_players(self) -> Dict[str, Optional[float]]:
+        """{nom playerctl: volume} des lecteurs autorisés en cours de lecture."""
+        if platform.system() != "Linux":
+            return {}
+        if self._watcher is not None and self._watcher.ready:
+            return {st.name: st.volume for st in self._watcher.players().values()
+                    if st.status == "Playing" and self.allowed(st.name)}
+        try:
+            cp = subprocess.run(["playerctl", "--all-players", "metadata", "--format", "{{playerInstance}}\t{{status}}\t{{volume}}"],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        except OSError as e:
+            log.warning("playerctl indisponible: %s", e)
+            return {}
+        out: Dict[str, Optional[float]] = {}
+        for line in cp.stdout.splitlines():
+            parts = line.split("\t")
+            if len(parts) != 3 or parts[1].strip().lower() != "playing" or not self.allowed(parts[0]):
+                continue
+            try:
+                out[parts[0]] = max(0.0, min(1.0, float(parts[2])))
+            except ValueError:
+                out[parts[0]] = None
+        return out
+
+    # --- low-level: une commande par lecteur, lancées en parallèle
+    def _playerctl_all(self, commands: Dict[str, List[str]]):
+        procs = []
+        for name, args in commands.items():
+            try:
+                procs.append(subprocess.Popen(["playerctl", f"--player={name}", *args],
+                                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+            except OSError as e:
+                log.warning("playerctl indisponible: %s", e)
+                return
+        for p in procs:
+            p.wait()
+
+    def _fade_all(self, ramps: Dict[str, tuple], duration_ms: int = 800, steps: int = 16):
+        """ramps = {lecteur: (départ, cible)} — tous les lecteurs suivent la même ligne de temps."""
+        if not ramps:
+            return
+        steps = max(1, int(steps))
+        delay = max(1, int(duration_ms/steps)) / 1000.0
+        t0 = time.monotonic()
+        for i in range(1, steps+1):
+            values = {name: start + (target - start) * (i/steps) for name, (start, target) in ramps.items()}
+            self._playerctl_all({name: ["volume", f"{v:.3f}"] for name, v in values.items()})
+            if self._watcher is not None:
+                for name, v in values.items():
+                    self._watcher.note_local(name, volume=v)
+            # se caler sur l'horloge plutôt que d'empiler les délais
+            remaining = t0 + i*delay - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+
+    # --- high-level
+    def duck_all(self, fade_ms: int = 800) -> bool:
+        """Baisse / met en pause tous les lecteurs actifs. Retourne True si `restore_all` doit être appelé."""
+        with self._lock:
+            if self._holders:
+                self._holders += 1
+                return True         # déjà coupés par une annonce en cours
+            # compteur pris seulement si la recherche réussit: une exception ne laisse pas de détenteur fantôme
+            players = self.playing_players()
+            if not players:
+                return False
+            self._holders = 1
+            self._saved = players
+            self._saved_action = action = self.action
+        log.info("Lecteurs actifs (%s): %s", action, ", ".join(sorted(players)))
+        floor = DUCK_RATIO if action == "duck" else 0.0
+        try:
+            self._fade_all({n: (v, v*floor) for n, v in players.items() if v is not None}, duration_ms=fade_ms)
+            if action == "pause":
+                self._playerctl_all({n: ["pause"] for n in players})
+        except Exception:
+            # détenteur pris: l'appelant doit quand même appeler restore_all
+            log.exception("Baisse des lecteurs incomplète")
+        return True
+
+    def restore_all(self, fade_ms: int = 800):
+        """Relance les lecteurs mis de côté par `duck_all` et remonte chacun à son volume d'origine."""
+        with self._lock:
+            self._holders = max(0, self._holders - 1)
+            if self._holders:
+                return              # une autre annonce joue encore
+            players, self._saved = self._saved, {}
+            action = self._saved_action     # réglages changés pendant l'annonce: on défait ce qui a été fait
+        if not players:
+            return
+        floor = DUCK_RATIO if action == "duck" else 0.0
+        if action == "pause":
+            self._playerctl_all({n: ["play"] for n in players})
+            # Small delay to ensure playback resumes before fading in
+            time.sleep(0.05)
+        self._fade_all({n: (v*floor, v) for n, v in players.items() if v is not None}, duration_ms=fade_ms)
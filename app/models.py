@@ -2,21 +2,34 @@
 # app/models.py
 # ==============================
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional
 
 class TaskType(Enum):
     FIXED_TIME     = "fixed_time"       # ex: 14:30 chaque jour
     AFTER_DURATION = "after_duration"   # répéter après X temps (secondes)
     AFTER_TASK     = "after_task"       # X temps après la fin d’une autre tâche
 
+@dataclass
+class Zone:
+    name: str                           # ex: "salle", "bureau", "extérieur"
+    device: str = ""                    # périphérique de sortie du moteur audio ("" = sortie par défaut)
+
 @dataclass
 class Settings:
     sound_dir: str
     output_volume: int                  # 0..100
     spotify_control_mode: str           # toujours "linux_mpris"
     theme: str = "system"               # "system" | "light" | "dark"
+    # Lecteurs MPRIS à couper pendant les annonces (noms playerctl séparés par des virgules)
+    players_include: str = ""           # vide => tous les lecteurs
+    players_exclude: str = ""
+    players_action: str = "pause"       # "pause" | "duck"
+    audio_backend: str = "vlc"          # "vlc" | "pcm" (sons pré-décodés, faible latence) | "null"
+    catchup_policy: str = "once"        # après une veille: "skip" | "once" | "all" (cf. scheduler.py)
+    zones: List[Zone] = field(default_factory=list)   # en plus de la zone par défaut
 
 @dataclass
 class Task:
@@ -39,5 +52,34 @@ class Task:
     # Dépendance
     after_task_id: Optional[int] = None
 
+    # Zone de diffusion (None => sortie par défaut)
+    zone: Optional[str] = None
+
     # Runtime
-    run_count: int = 0
\ No newline at end of file
+    run_count: int = 0
+
+@dataclass
+class SoundInfo:
+    """Métadonnées d'un fichier son (cache app/sound_meta.py)."""
+    path: str
+    mtime: float
+    duration: Optional[float] = None    # secondes
+    channels: Optional[int] = None
+    samplerate: Optional[int] = None
+    peak_db: Optional[float] = None     # dBFS
+    rms_db: Optional[float] = None      # dBFS
+    waveform: bytes = b""               # crêtes sous-échantillonnées, 0..255
+    error: Optional[str] = None         # fichier illisible (pas de nouvel essai tant que mtime ne change pas)
+
+@dataclass
+class RunRecord:
+    """Une exécution de tâche (historique)."""
+    task_id: int
+    scheduled_at: datetime              # heure prévue de déclenchement
+    started_at: datetime
+    ended_at: datetime
+    outcome: str                        # "ok" | "error" | "timeout"
+
+    @property
+    def latency_ms(self) -> int:
+        return max(0, int((self.started_at - self.scheduled_at).total_seconds() * 1000))
@@ -0,0 +1,231 @@
+# ==============================
+# app/mpris.py
+# ==============================
+from __future__ import annotations
+import logging
+import threading
+from collections import deque
+from contextlib import ExitStack
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Optional
+
+log = logging.getLogger("SoundsScheduler")
+
+MPRIS_PREFIX = "org.mpris.MediaPlayer2."
+MPRIS_PATH = "/org/mpris/MediaPlayer2"
+PLAYER_IFACE = "org.mpris.MediaPlayer2.Player"
+
+def _safe_import_jeepney():
+    try:
+        import jeepney  # type: ignore
+        from jeepney.io.blocking import open_dbus_connection  # type: ignore
+        return jeepney, open_dbus_connection
+    except Exception:
+        return None, None
+
+def short_name(bus_name: str) -> str:
+    """org.mpris.MediaPlayer2.vlc.instance42 -> vlc.instance42 (format de `playerctl -l`)."""
+    return bus_name[len(MPRIS_PREFIX):] if bus_name.startswith(MPRIS_PREFIX) else bus_name
+
+
+@dataclass
+class PlayerState:
+    bus_name: str
+    status: str = "Stopped"             # "Playing" | "Paused" | "Stopped"
+    volume: Optional[float] = None      # 0.0..1.0, None si non exposé
+
+    @property
+    def name(self) -> str:
+        return short_name(self.bus_name)
+
+
+class MprisWatcher:
+    """Cache en mémoire de l'état des lecteurs MPRIS, alimenté par les signaux D-Bus.
+
+    Un thread dédié s'abonne à `PropertiesChanged` (PlaybackStatus, Volume) et à
+    `NameOwnerChanged` (apparition / disparition d'un lecteur). Les lectures
+    (`get`, `players`) ne font donc aucun appel D-Bus. Si jeepney n'est pas installé
+    ou si le bus de session est inaccessible, `ready` reste faux et les appelants
+    se rabattent sur playerctl.
+    """
+
+    def __init__(self, match: Optional[Callable[[str], bool]] = None, bus: str = "SESSION", reply_timeout: float = 2.0):
+        self.match = match or (lambda name: True)      # filtre sur le nom court du lecteur
+        self.bus = bus
+        self.reply_timeout = reply_timeout
+        self._players: Dict[str, PlayerState] = {}     # bus_name -> état
+        self._owners: Dict[str, str] = {}              # nom unique (:1.42) -> bus_name
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- lifecycle
+    def start(self) -> bool:
+        jeepney, _ = _safe_import_jeepney()
+        if jeepney is None:
+            log.info("jeepney absent — état MPRIS interrogé via playerctl")
+            return False
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mpris-watch", daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=3)
+            self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: float = 2.0) -> bool:
+        return self._ready.wait(timeout)
+
+    # --- lectures sans appel D-Bus
+    def players(self) -> Dict[str, PlayerState]:
+        with self._lock:
+            return {k: replace(v) for k, v in self._players.items()}
+
+    def get(self, name: str) -> Optional[PlayerState]:
+        """État du lecteur `name` (nom court, ex. "spotify"); accepte aussi les suffixes d'instance."""
+        with self._lock:
+            for bus_name, st in self._players.items():
+                n = short_name(bus_name)
+                if n == name or n.startswith(name + "."):
+                    return replace(st)
+        return None
+
+    def note_local(self, name: str, volume: Optional[float] = None, status: Optional[str] = None):
+        """Répercute immédiatement une commande envoyée par l'app (certains lecteurs n'émettent pas tout)."""
+        with self._lock:
+            for bus_name, st in self._players.items():
+                n = short_name(bus_name)
+                if n == name or n.startswith(name + "."):
+                    if volume is not None:
+                        st.volume = max(0.0, min(1.0, float(volume)))
+                    if status is not None:
+                        st.status = status
+
+    # --- thread D-Bus
+    def _run(self):
+        jeepney, open_dbus_connection = _safe_import_jeepney()
+        while not self._stop.is_set():
+            try:
+                conn = open_dbus_connection(bus=self.bus)
+            except Exception as e:
+                log.warning("Bus D-Bus %s inaccessible (%s) — nouvel essai dans 5 s", self.bus, e)
+                self._stop.wait(5)
+                continue
+            try:
+                self._serve(jeepney, conn)
+            except Exception:
+                log.exception("Surveillance MPRIS interrompue — reconnexion")
+            finally:
+                self._ready.clear()
+                with self._lock:
+                    self._players.clear()
+                    self._owners.clear()
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._stop.wait(2)
+
+    def _serve(self, jeepney, conn):
+        from jeepney.bus_messages import message_bus  # type: ignore
+        props_rule = jeepney.MatchRule(type="signal", interface="org.freedesktop.DBus.Properties",
+                                       member="PropertiesChanged", path=MPRIS_PATH)
+        owner_rule = jeepney.MatchRule(type="signal", sender="org.freedesktop.DBus", interface="org.freedesktop.DBus",
+                                       member="NameOwnerChanged", path="/org/freedesktop/DBus")
+        owner_rule.add_arg_condition(0, "org.mpris.MediaPlayer2", "namespace")
+        queue: deque = deque()
+        with ExitStack() as stack:
+            for rule in (props_rule, owner_rule):
+                stack.enter_context(conn.filter(rule, queue=queue))
+                self._call(jeepney, conn, message_bus.AddMatch(rule))
+
+            # état initial: lecteurs déjà présents sur le bus
+            names = self._call(jeepney, conn, message_bus.ListNames())[0]
+            for bus_name in names:
+                if bus_name.startswith(MPRIS_PREFIX) and self.match(short_name(bus_name)):
+                    try:
+                        owner = self._call(jeepney, conn, message_bus.GetNameOwner(bus_name))[0]
+                    except Exception:
+                        continue
+                    self._player_appeared(jeepney, conn, bus_name, owner)
+            self._ready.set()
+            log.info("Surveillance MPRIS active (%d lecteur(s))", len(self._players))
+
+            while not self._stop.is_set():
+                try:
+                    msg = conn.recv_until_filtered(queue, timeout=1.0)
+                except TimeoutError:
+                    continue
+                member = msg.header.fields.get(jeepney.HeaderFields.member)
+                if member == "NameOwnerChanged":
+                    bus_name, _old, new = msg.body
+                    if not self.match(short_name(bus_name)):
+                        continue
+                    if new:
+                        self._player_appeared(jeepney, conn, bus_name, new)
+                    else:
+                        self._player_vanished(bus_name)
+                elif member == "PropertiesChanged":
+                    sender = msg.header.fields.get(jeepney.HeaderFields.sender)
+                    iface, changed, invalidated = msg.body
+                    if iface != PLAYER_IFACE:
+                        continue
+                    with self._lock:
+                        bus_name = self._owners.get(sender)
+                    if bus_name is None:
+                        continue
+                    if {"PlaybackStatus", "Volume"} & set(invalidated):
+                        self._refresh(jeepney, conn, bus_name)
+                    else:
+                        self._apply(bus_name, changed)
+
+    def _call(self, jeepney, conn, msg) -> tuple:
+        # lève DBusErrorResponse si le bus / le lecteur répond par une erreur
+        from jeepney.wrappers import unwrap_msg  # type: ignore
+        return unwrap_msg(conn.send_and_get_reply(msg, timeout=self.reply_timeout))
+
+    def _player_appeared(self, jeepney, conn, bus_name: str, owner: str):
+        with self._lock:
+            # un lecteur redémarré garde son nom mais change de nom unique
+            for k in [k for k, v in self._owners.items() if v == bus_name]:
+                del self._owners[k]
+            self._owners[owner] = bus_name
+            self._players[bus_name] = PlayerState(bus_name)
+        self._refresh(jeepney, conn, bus_name)
+
+    def _player_vanished(self, bus_name: str):
+        with self._lock:
+            self._players.pop(bus_name, None)
+            for k in [k for k, v in self._owners.items() if v == bus_name]:
+                del self._owners[k]
+        log.info("Lecteur MPRIS disparu: %s", short_name(bus_name))
+
+    def _refresh(self, jeepney, conn, bus_name: str):
+        addr = jeepney.DBusAddress(MPRIS_PATH, bus_name=bus_name, interface=PLAYER_IFACE)
+        try:
+            body = self._call(jeepney, conn, jeepney.Properties(addr).get_all())
+        except Exception as e:
+            log.warning("GetAll %s a échoué: %s", short_name(bus_name), e)
+            return
+        self._apply(bus_name, body[0])
+
+    def _apply(self, bus_name: str, props: dict):
+        with self._lock:
+            st = self._players.get(bus_name)
+            if st is None:
+                return
+            if "PlaybackStatus" in props:
+                st.status = str(props["PlaybackStatus"][1])
+            if "Volume" in props:
+                try:
+                    st.volume = max(0.0, min(1.0, float(props["Volume"][1])))
+                except (TypeError, ValueError):
+                    st.volume = None
@@ -0,0 +1,167 @@
+# ==============================
+# app/mpris_check.py
+# ==============================
+"""Vérification de MprisWatcher contre de faux lecteurs MPRIS, sur un bus de session privé.
+
+    dbus-run-session -- python -m app.mpris_check
+
+Publie des lecteurs factices (jeepney) et vérifie que le cache du watcher suit:
+lecteur déjà présent au démarrage, PropertiesChanged (valeurs et propriétés
+invalidées), apparition et disparition d'un lecteur. Sort en erreur (code 1) au
+premier écart, code 2 si jeepney ou le bus de session manquent.
+"""
+from __future__ import annotations
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional
+from .mpris import MPRIS_PATH, MPRIS_PREFIX, PLAYER_IFACE, MprisWatcher, _safe_import_jeepney
+from .spotify_control import SpotifyController
+
+PROPS_IFACE = "org.freedesktop.DBus.Properties"
+
+
+class FakePlayer:
+    """Lecteur MPRIS minimal: Properties.Get/GetAll et signal PropertiesChanged.
+
+    Toutes les entrées/sorties D-Bus passent par le thread du lecteur; `set` et
+    `invalidate` y sont relayés par une file.
+    """
+
+    def __init__(self, name: str, status: str = "Stopped", volume: float = 1.0):
+        self.bus_name = MPRIS_PREFIX + name
+        self.props: Dict[str, tuple] = {"PlaybackStatus": ("s", status), "Volume": ("d", volume)}
+        self._todo: "queue.Queue[Callable[[], None]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._registered = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"fake-{name}", daemon=True)
+
+    def start(self) -> "FakePlayer":
+        self._thread.start()
+        if not self._registered.wait(5):
+            raise RuntimeError(f"{self.bus_name}: nom non obtenu sur le bus")
+        return self
+
+    def stop(self):
+        # fermer la connexion libère le nom: NameOwnerChanged(nom, ancien, "")
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def set(self, **props):
+        """Change des propriétés et émet PropertiesChanged avec les nouvelles valeurs."""
+        self._todo.put(lambda: self._changed(props, invalidate=False))
+
+    def invalidate(self, **props):
+        """Change des propriétés mais ne les annonce que comme invalidées (le watcher doit relire)."""
+        self._todo.put(lambda: self._changed(props, invalidate=True))
+
+    def _changed(self, props: dict, invalidate: bool):
+        jeepney = self._jeepney
+        for k, v in props.items():
+            self.props[k] = ("s", v) if isinstance(v, str) else ("d", float(v))
+        changed = {} if invalidate else {k: self.props[k] for k in props}
+        addr = jeepney.DBusAddress(MPRIS_PATH, interface=PROPS_IFACE)
+        self._conn.send(jeepney.new_signal(addr, "PropertiesChanged", "sa{sv}as",
+                                           (PLAYER_IFACE, changed, list(props) if invalidate else [])))
+
+    def _run(self):
+        jeepney, open_dbus_connection = _safe_import_jeepney()
+        from jeepney.bus_messages import message_bus  # type: ignore
+        self._jeepney = jeepney
+        with open_dbus_connection(bus="SESSION") as conn:
+            self._conn = conn
+            conn.send_and_get_reply(message_bus.RequestName(self.bus_name), timeout=5)
+            self._registered.set()
+            while not self._stop.is_set():
+                while not self._todo.empty():
+                    self._todo.get()()
+                try:
+                    msg = conn.receive(timeout=0.05)
+                except TimeoutError:
+                    continue
+                if msg.header.message_type == jeepney.MessageType.method_call:
+                    conn.send(self._reply(jeepney, msg))
+
+    def _reply(self, jeepney, msg):
+        fields = msg.header.fields
+        member = fields.get(jeepney.HeaderFields.member)
+        if fields.get(jeepney.HeaderFields.interface) == PROPS_IFACE and msg.body and msg.body[0] == PLAYER_IFACE:
+            if member == "GetAll":
+                return jeepney.new_method_return(msg, "a{sv}", (dict(self.props),))
+            if member == "Get" and msg.body[1] in self.props:
+                return jeepney.new_method_return(msg, "v", (self.props[msg.body[1]],))
+        return jeepney.new_error(msg, "org.freedesktop.DBus.Error.UnknownMethod")
+
+
+class Check:
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.failures = 0
+
+    def until(self, label: str, probe: Callable[[], object], expected: object):
+        """Attend que `probe()` vaille `expected` (les signaux arrivent de façon asynchrone)."""
+        deadline = time.monotonic() + self.timeout
+        got = probe()
+        while got != expected and time.monotonic() < deadline:
+            time.sleep(0.02)
+            got = probe()
+        ok = got == expected
+        self.failures += 0 if ok else 1
+        print(f"{'OK   ' if ok else 'ÉCHEC'} {label}" + ("" if ok else f" (attendu {expected!r}, obtenu {got!r})"))
+
+
+def _state(watcher: MprisWatcher, name: str) -> Optional[tuple]:
+    st = watcher.get(name)
+    return None if st is None else (st.status, st.volume)
+
+
+def run(timeout: float) -> bool:
+    check = Check(timeout)
+    spotify = FakePlayer("spotify", status="Paused", volume=0.5).start()
+    watcher = MprisWatcher(reply_timeout=timeout)
+    watcher.start()
+    vlc = None
+    try:
+        check.until("watcher prêt", lambda: watcher.wait_ready(timeout), True)
+        check.until("lecteur déjà présent relu au démarrage", lambda: _state(watcher, "spotify"), ("Paused", 0.5))
+
+        spotify.set(PlaybackStatus="Playing", Volume=0.3)
+        check.until("PropertiesChanged (valeurs) appliqué", lambda: _state(watcher, "spotify"), ("Playing", 0.3))
+        controller = SpotifyController(watcher=watcher)
+        check.until("SpotifyController lit l'état poussé", controller.is_playing, True)
+
+        spotify.invalidate(Volume=0.8)
+        check.until("PropertiesChanged (invalidé) relu par GetAll", lambda: _state(watcher, "spotify"), ("Playing", 0.8))
+
+        vlc = FakePlayer("vlc.instance42", status="Playing", volume=1.0).start()
+        check.until("apparition d'un lecteur (NameOwnerChanged)", lambda: _state(watcher, "vlc"), ("Playing", 1.0))
+
+        spotify.stop()
+        check.until("disparition d'un lecteur", lambda: _state(watcher, "spotify"), None)
+        check.until("les autres lecteurs restent suivis", lambda: sorted(watcher.players()), [MPRIS_PREFIX + "vlc.instance42"])
+    finally:
+        watcher.stop()
+        spotify.stop()
+        if vlc is not None:
+            vlc.stop()
+    print("OK: cache MPRIS conforme" if not check.failures else f"ÉCHEC: {check.failures} vérification(s)")
+    return not check.failures
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m app.mpris_check", description=__doc__.splitlines()[0])
+    ap.add_argument("--timeout", type=float, default=3.0, help="attente max par vérification (s)")
+    args = ap.parse_args(argv)
+    if _safe_import_jeepney()[0] is None:
+        print("jeepney absent: pip install jeepney")
+        sys.exit(2)
+    if not os.environ.get("DBUS_SESSION_BUS_ADDRESS"):
+        print("Aucun bus de session: lancer via `dbus-run-session -- python -m app.mpris_check`")
+        sys.exit(2)
+    sys.exit(0 if run(args.timeout) else 1)
+
+if __name__ == "__main__":
+    main()
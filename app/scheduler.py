@@ -2,40 +2,221 @@
 # app/scheduler.py
 # ==============================
 from __future__ import annotations
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.base import BaseTrigger
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
-from datetime import datetime
-from typing import Callable
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+log = logging.getLogger("SoundsScheduler")
+
+CATCHUP_POLICIES = ("skip", "once", "all")
+CLOCK_CHECK_SECONDS = 1.0       # période de comparaison horloge murale / monotone
+CLOCK_JUMP_THRESHOLD_S = 2.0    # écart en dessous duquel on ignore (dérive, correction NTP progressive)
+CATCHUP_MAX_RUNS = 20           # plafond de la politique "all"
+
+
+@dataclass
+class ClockJump:
+    kind: str               # "suspend" (veille: le temps a réellement passé) | "clock" (heure réglée)
+    offset: float           # écart entre l'horloge murale et l'horloge monotone (s)
+    before: datetime        # heure murale avant le saut
+    after: datetime         # heure murale à la détection
+
+
+def _boottime() -> Optional[float]:
+    """Horloge qui avance pendant la veille (Linux), None ailleurs."""
+    clk = getattr(time, "CLOCK_BOOTTIME", None)
+    return time.clock_gettime(clk) if clk is not None else None
+
+
+class ClockWatcher(threading.Thread):
+    """Compare l'horloge murale à l'horloge monotone et signale les discontinuités.
+
+    `time.monotonic` ne compte pas la veille: un saut de l'heure murale qui se retrouve
+    aussi sur CLOCK_BOOTTIME est une mise en veille, sinon c'est un réglage de l'heure.
+    Sans CLOCK_BOOTTIME, un saut en avant est supposé être une veille.
+    """
+
+    def __init__(self, on_jump: Callable[[ClockJump], None], period: float = CLOCK_CHECK_SECONDS,
+                 threshold: float = CLOCK_JUMP_THRESHOLD_S):
+        super().__init__(name="clock-watch", daemon=True)
+        self.on_jump = on_jump
+        self.period = period
+        self.threshold = threshold
+        self._stop = threading.Event()
+
+    def run(self):
+        wall, mono, boot = time.time(), time.monotonic(), _boottime()
+        while not self._stop.wait(self.period):
+            wall2, mono2, boot2 = time.time(), time.monotonic(), _boottime()
+            offset = (wall2 - wall) - (mono2 - mono)
+            if abs(offset) >= self.threshold:
+                if boot is not None:
+                    slept = (boot2 - boot) - (mono2 - mono)
+                    kind = "suspend" if slept >= self.threshold and abs(offset - slept) < self.threshold else "clock"
+                else:
+                    kind = "suspend" if offset > 0 else "clock"
+                try:
+                    self.on_jump(ClockJump(kind, offset, datetime.fromtimestamp(wall), datetime.fromtimestamp(wall2)))
+                except Exception:
+                    log.exception("Traitement du saut d'horloge en erreur")
+            wall, mono, boot = wall2, mono2, boot2
+
+    def stop(self):
+        self._stop.set()
+
 
 class TaskScheduler:
-    def __init__(self):
+    def __init__(self, watch_clock: bool = True):
         self.sched = BackgroundScheduler(job_defaults={"misfire_grace_time": 60})
         self.sched.start()
         self._job_ids = {}
+        # Rattrapage des déclenchements manqués pendant une veille: skip | once | all
+        self.catchup_policy = "once"
+        # (task_id, nouvelle ancre) -> job; fourni par l'hôte pour garder l'heure prévue juste.
+        # Les jobs acceptent `run_key` (clé de dédoublonnage en file de zone, cf. _catch_up).
+        self.job_factory: Optional[Callable[[int, datetime], Callable]] = None
+        self._clock_watch = ClockWatcher(self.on_clock_jump) if watch_clock else None
+        if self._clock_watch:
+            self._clock_watch.start()
 
-    def clear(self):
+    # --- backend (surchargé par le simulateur, cf. app/simulation.py)
+    def _add_job(self, jid: str, func: Callable, trigger: BaseTrigger, next_run_time: datetime | None = None, replace_existing: bool = True):
+        kw = {} if next_run_time is None else {"next_run_time": next_run_time}
+        return self.sched.add_job(func, trigger, id=jid, replace_existing=replace_existing, **kw)
+
+    def _remove_job(self, jid: str):
+        self.sched.remove_job(jid)
+
+    def _remove_all_jobs(self):
         self.sched.remove_all_jobs()
+
+    # --- API
+    def clear(self):
+        self._remove_all_jobs()
         self._job_ids.clear()
 
     def schedule_daily_fixed(self, task_id: int, hour: int, minute: int, func: Callable):
         jid = f"task_{task_id}"
         trig = CronTrigger(hour=hour, minute=minute)
-        self._job_ids[task_id] = self.sched.add_job(func, trig, id=jid, replace_existing=True)
+        self._job_ids[task_id] = self._add_job(jid, func, trig)
 
     def schedule_every_seconds(self, task_id: int, seconds: int, func: Callable, next_run_time: datetime | None = None):
         jid = f"task_{task_id}"
         trig = IntervalTrigger(seconds=seconds)
-        self._job_ids[task_id] = self.sched.add_job(func, trig, id=jid, replace_existing=True, next_run_time=next_run_time)
+        self._job_ids[task_id] = self._add_job(jid, func, trig, next_run_time=next_run_time)
 
     def schedule_once_at(self, task_id: int, run_date: datetime, func: Callable):
         jid = f"task_once_{task_id}_{int(run_date.timestamp())}"
-        self.sched.add_job(func, 'date', id=jid, run_date=run_date, replace_existing=False)
+        self._add_job(jid, func, DateTrigger(run_date=run_date), replace_existing=False)
+
+    def shutdown(self):
+        if self._clock_watch:
+            self._clock_watch.stop()
+        self.sched.shutdown(wait=False)
+
+    # --- sauts d'horloge
+    def on_clock_jump(self, jump: ClockJump):
+        """Recalcule les jobs touchés par un saut d'horloge.
+
+        - réglage de l'heure: les intervalles et les dépendantes (`task_once_*`) mesurent
+          une durée écoulée, ils sont décalés du saut; les heures fixes ne bougent pas.
+        - veille (ou saut en avant): les déclenchements tombés dans (avant, après] sont
+          rattrapés selon `catchup_policy`, puis chaque job reprend à son prochain créneau.
+        """
+        label = "mise en veille" if jump.kind == "suspend" else "réglage de l'heure"
+        log.warning("Saut d'horloge détecté (%s): %+.1f s (%s -> %s)", label, jump.offset,
+                    jump.before.strftime("%H:%M:%S"), jump.after.strftime("%H:%M:%S"))
+        shifted = caught_up = 0
+        for job in self.sched.get_jobs():
+            if job.next_run_time is None or job.id.startswith("catchup_"):
+                continue        # job en pause / rattrapage déjà dû
+            elapsed_based = isinstance(job.trigger, (IntervalTrigger, DateTrigger))
+            try:
+                if jump.kind == "clock" and elapsed_based:
+                    self._shift_job(job, jump.offset)
+                    shifted += 1
+                elif jump.offset > 0:
+                    caught_up += self._catch_up(job, jump)
+            except JobLookupError:
+                # job exécuté ou supprimé (rechargement) depuis get_jobs(): rien à recalculer
+                log.info("Job %s disparu pendant le recalcul, ignoré", job.id)
+        log.info("Saut d'horloge: %d job(s) décalé(s), %d rattrapage(s) (politique: %s)",
+                 shifted, caught_up, self.catchup_policy)
+        self.sched.wakeup()
+
+    def _rebuilt_func(self, job, anchor: datetime):
+        task_id = task_id_of(job.id)
+        if self.job_factory is None or task_id is None:
+            return job.func
+        return self.job_factory(task_id, anchor) or job.func
+
+    def _shift_job(self, job, offset: float):
+        delta = timedelta(seconds=offset)
+        nxt = job.next_run_time + delta
+        anchor = nxt.replace(tzinfo=None)
+        changes = {"next_run_time": nxt, "func": self._rebuilt_func(job, anchor)}
+        if isinstance(job.trigger, IntervalTrigger):
+            changes["trigger"] = IntervalTrigger(seconds=job.trigger.interval.total_seconds(), start_date=nxt)
+        else:
+            changes["trigger"] = DateTrigger(run_date=nxt)
+        self.sched.modify_job(job.id, **changes)
+
+    def _catch_up(self, job, jump: ClockJump) -> int:
+        now = datetime.now(job.next_run_time.tzinfo)
+        before = jump.before.replace(tzinfo=None).astimezone(job.next_run_time.tzinfo)
+        if isinstance(job.trigger, DateTrigger):
+            missed: List[datetime] = [job.next_run_time] if job.next_run_time <= now else []
+            nxt = None
+        else:
+            missed = []
+            fire = job.trigger.get_next_fire_time(None, before)
+            while fire is not None and fire <= now and len(missed) <= CATCHUP_MAX_RUNS:
+                missed.append(fire)
+                fire = job.trigger.get_next_fire_time(fire, fire)
+            nxt = job.trigger.get_next_fire_time(None, now)
+        if not missed:
+            return 0
+        policy = self.catchup_policy if self.catchup_policy in CATCHUP_POLICIES else "once"
+        runs = {"skip": 0, "once": 1, "all": min(len(missed), CATCHUP_MAX_RUNS)}[policy]
+        if policy == "all" and len(missed) > CATCHUP_MAX_RUNS:
+            log.warning("Job %s: rattrapage limité à %d exécutions", job.id, CATCHUP_MAX_RUNS)
+        log.info("Job %s: %d déclenchement(s) manqué(s), %d rattrapé(s)", job.id, len(missed), runs)
+        if isinstance(job.trigger, DateTrigger):
+            if runs:
+                self.sched.modify_job(job.id, next_run_time=now)   # n'est plus un raté pour APScheduler
+            else:
+                self.sched.remove_job(job.id)
+            return runs
+        # les créneaux de l'intervalle/cron sont conservés: le job reprend au prochain après `now`
+        self.sched.modify_job(job.id, next_run_time=nxt)
+        for i in range(runs):
+            # chaque rattrapage a sa propre clé: la file de la zone ne le prend pas pour un doublon
+            cid = f"catchup_{job.id}_{int(now.timestamp())}_{i}"
+            self.sched.add_job(job.func, DateTrigger(run_date=now), id=cid, kwargs={"run_key": cid}, replace_existing=True)
+        return runs
 
     def remove(self, task_id: int):
         jid = f"task_{task_id}"
         try:
-            self.sched.remove_job(jid)
+            self._remove_job(jid)
         except Exception:
             pass
-        self._job_ids.pop(task_id, None)
\ No newline at end of file
+        self._job_ids.pop(task_id, None)
+
+
+def task_id_of(jid: str) -> Optional[int]:
+    """task_<id> ou task_once_<id>_<ts> -> id."""
+    parts = jid.split("_")
+    try:
+        return int(parts[2] if parts[1] == "once" else parts[1])
+    except (IndexError, ValueError):
+        return None
@@ -0,0 +1,246 @@
+# ==============================
+# app/simulation.py
+# ==============================
+"""Simulation accélérée de la planification sur une horloge virtuelle.
+
+    python -m app.simulation --days 7 --out trace.csv
+    python -m app.simulation --days 1 --synthetic 500      # générateur de charge
+
+Les tâches sont lues depuis une copie de app.db (la base réelle n'est jamais modifiée),
+planifiées par le même code que l'application (JobsMixin + TaskScheduler), puis
+exécutées aussi vite que le CPU le permet avec une lecture factice de durée connue.
+Les jobs s'exécutent l'un après l'autre, comme sur l'unique lecteur audio de l'app:
+un son qui déborde sur le déclenchement suivant apparaît donc comme de la latence.
+"""
+from __future__ import annotations
+import argparse
+import csv
+import heapq
+import itertools
+import logging
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from .audio_player import AudioPlayer, NullBackend
+from .clock import VirtualClock
+from .config import DB_PATH
+from .history import RunCounters
+from .jobs import JobsMixin
+from .media_control import NullMediaController
+from .models import RunRecord, Task, TaskType
+from .scheduler import TaskScheduler, task_id_of
+from .storage import Storage
+
+log = logging.getLogger("SoundsScheduler")
+
+
+class VirtualScheduler(TaskScheduler):
+    """TaskScheduler dont les jobs sont déclenchés par `run_until` sur une VirtualClock.
+
+    Reproduit les règles utiles d'APScheduler: `misfire_grace_time` (un déclenchement
+    trop en retard est manqué) et `coalesce` (les déclenchements en retard d'un même
+    job sont fusionnés en un seul).
+    """
+
+    def __init__(self, clock: VirtualClock, misfire_grace_time: float = 60,
+                 on_missed: Optional[Callable[[str, datetime], None]] = None):
+        # pas de TaskScheduler.__init__ (APScheduler, surveillance de l'horloge murale):
+        # ses attributs publics sont posés ici, shutdown / on_clock_jump sont surchargés
+        self.catchup_policy = "once"
+        self.job_factory = None
+        self._clock_watch = None
+        self.clock = clock
+        self.misfire_grace_time = misfire_grace_time
+        self.on_missed = on_missed
+        self._job_ids = {}
+        self._jobs: Dict[str, Tuple[BaseTrigger, Callable, int]] = {}   # jid -> (trigger, func, jeton)
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._tokens = itertools.count()
+        self.fired = 0
+        self.missed = 0
+        self.errors = 0
+
+    # --- backend TaskScheduler
+    def _add_job(self, jid, func, trigger, next_run_time=None, replace_existing=True):
+        if jid in self._jobs and not replace_existing:
+            raise ValueError(f"Job {jid} déjà planifié")
+        token = next(self._tokens)
+        self._jobs[jid] = (trigger, func, token)
+        when = next_run_time or self._next_fire(trigger, None)
+        if when is not None:
+            heapq.heappush(self._heap, (when, token, jid))
+        return jid
+
+    def _remove_job(self, jid):
+        del self._jobs[jid]
+
+    def _remove_all_jobs(self):
+        self._jobs.clear()
+        self._heap.clear()
+
+    def shutdown(self):
+        self._remove_all_jobs()
+
+    def on_clock_jump(self, jump):
+        # l'horloge virtuelle n'avance que par run_until: aucun saut à rattraper
+        log.info("Saut d'horloge ignoré par la simulation (%+.1f s)", jump.offset)
+
+    def _next_fire(self, trigger: BaseTrigger, prev: Optional[datetime]) -> Optional[datetime]:
+        if isinstance(trigger, IntervalTrigger):
+            return (prev or self.clock.now()) + trigger.interval
+        if isinstance(trigger, DateTrigger):
+            return None if prev else trigger.run_date.replace(tzinfo=None)
+        # CronTrigger: calcul en heure locale, résultat ramené en datetime naïf
+        base = prev + timedelta(seconds=1) if prev else self.clock.now()
+        nxt = trigger.get_next_fire_time(None, base.astimezone())
+        return nxt.astimezone().replace(tzinfo=None) if nxt else None
+
+    # --- boucle de simulation
+    def run_until(self, end: datetime):
+        while self._heap and self._heap[0][0] <= end:
+            when, token, jid = heapq.heappop(self._heap)
+            job = self._jobs.get(jid)
+            if job is None or job[2] != token:
+                continue        # supprimé ou remplacé depuis
+            trigger, func, _ = job
+            self.clock.advance_to(when)
+            now = self.clock.now()
+            # coalesce: ne garder que le dernier déclenchement déjà dû
+            nxt = self._next_fire(trigger, when)
+            while nxt is not None and nxt <= now:
+                when, nxt = nxt, self._next_fire(trigger, nxt)
+            if nxt is None:
+                self._jobs.pop(jid, None)       # job 'date' terminé
+            if (now - when).total_seconds() > self.misfire_grace_time:
+                self.missed += 1
+                if self.on_missed:
+                    self.on_missed(jid, when)
+            else:
+                self.fired += 1
+                try:
+                    func()
+                except Exception:
+                    self.errors += 1
+                    log.exception("Job %s en erreur (simulation)", jid)
+            current = self._jobs.get(jid)
+            if nxt is not None and current is not None and current[2] == token:
+                heapq.heappush(self._heap, (nxt, token, jid))
+
+
+class TraceRecorder:
+    """Remplace RunHistoryWriter: garde la trace d'exécution en mémoire."""
+
+    def __init__(self):
+        self.records: List[RunRecord] = []
+
+    def record(self, rec: RunRecord):
+        self.records.append(rec)
+
+    def write_csv(self, path: Path, names: Dict[int, str]):
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["task_id", "name", "scheduled_at", "started_at", "ended_at", "outcome", "latency_ms"])
+            for r in sorted(self.records, key=lambda r: (r.scheduled_at, r.task_id)):
+                w.writerow([r.task_id, names.get(r.task_id, ""), r.scheduled_at.isoformat(), r.started_at.isoformat(),
+                            r.ended_at.isoformat(), r.outcome, r.latency_ms])
+
+
+class SimulationHost(JobsMixin):
+    def __init__(self, storage: Storage, clock: VirtualClock, default_duration: float, grace: float):
+        self.clock = clock
+        self.storage = storage
+        self.history = TraceRecorder()
+        self.counters = RunCounters(storage)
+        self.scheduler = VirtualScheduler(clock, misfire_grace_time=grace, on_missed=self._on_missed)
+        self.player = AudioPlayer(NullBackend(realtime=True, default_duration=default_duration, sleep=clock.sleep))
+        self.media = NullMediaController()
+        self.settings = storage.load_settings()
+        self.interval_running = True
+        self._dependents = {}
+        self._tasks_by_id = {}
+
+    def _on_missed(self, jid: str, when: datetime):
+        task_id = task_id_of(jid)
+        now = self.clock.now()
+        self.history.record(RunRecord(task_id, when, now, now, "missed"))
+
+
+def copy_db(src: Path, dst: Path):
+    """Copie cohérente de la base (API backup de SQLite), même si l'app tourne."""
+    with sqlite3.connect(src) as s, sqlite3.connect(dst) as d:
+        s.backup(d)
+
+
+def add_synthetic_tasks(storage: Storage, count: int, sound: str, seed: int = 0):
+    rnd = random.Random(seed)
+    for i in range(count):
+        kind = rnd.random()
+        if kind < 0.4:
+            t = Task(None, f"synth-fixe-{i}", sound, TaskType.FIXED_TIME, 0, at_hour=rnd.randrange(24), at_minute=rnd.randrange(60))
+        else:
+            t = Task(None, f"synth-int-{i}", sound, TaskType.AFTER_DURATION, rnd.choice((30, 60, 300, 900, 3600)),
+                     max_occurrences=rnd.choice((None, None, 10, 100)), start_now=False)
+        t.id = storage.add_task(t)
+        if rnd.random() < 0.2:
+            storage.add_task(Task(None, f"synth-dep-{i}", sound, TaskType.AFTER_TASK, rnd.choice((5, 30, 120)), after_task_id=t.id))
+
+
+def simulate(db: Path, days: float, start: datetime, default_duration: float, grace: float,
+             synthetic: int = 0, out: Optional[Path] = None) -> SimulationHost:
+    # la copie de app.db (données de l'utilisateur) est supprimée avec le dossier, même en cas d'erreur
+    with tempfile.TemporaryDirectory(prefix="soundsscheduler-sim-") as tmp:
+        return _simulate(Path(tmp), db, days, start, default_duration, grace, synthetic, out)
+
+
+def _simulate(workdir: Path, db: Path, days: float, start: datetime, default_duration: float, grace: float,
+              synthetic: int, out: Optional[Path]) -> SimulationHost:
+    sim_db = workdir / "sim.db"
+    if db.exists():
+        copy_db(db, sim_db)
+    storage = Storage(sim_db)
+    if synthetic:
+        add_synthetic_tasks(storage, synthetic, str(workdir / "synthetic.wav"))
+    clock = VirtualClock(start)
+    host = SimulationHost(storage, clock, default_duration, grace)
+    tasks = storage.list_tasks()
+    host.counters.load(tasks)
+    host._schedule_all(tasks)
+    t0 = time.perf_counter()
+    host.scheduler.run_until(start + timedelta(days=days))
+    wall = time.perf_counter() - t0
+    sched = host.scheduler
+    span = (clock.now() - start).total_seconds()
+    print(f"{sched.fired} exécutions, {sched.missed} manquées, {sched.errors} en erreur "
+          f"sur {days:g} j simulés en {wall:.2f} s ({sched.fired / wall if wall else 0:.0f} jobs/s, x{span / wall if wall else 0:.0f})")
+    if out:
+        host.history.write_csv(out, {t.id: t.name for t in host._tasks_by_id.values()})
+        print(f"Trace écrite dans {out}")
+    host.counters.close()
+    storage.conn.close()
+    return host
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m app.simulation", description=__doc__.splitlines()[0])
+    ap.add_argument("--db", type=Path, default=DB_PATH, help="base à simuler (copiée, jamais modifiée)")
+    ap.add_argument("--days", type=float, default=7)
+    ap.add_argument("--start", type=datetime.fromisoformat, default=None, help="début (ISO), défaut: maintenant")
+    ap.add_argument("--duration", type=float, default=2.0, help="durée des sons non-WAV (s)")
+    ap.add_argument("--grace", type=float, default=60, help="misfire_grace_time (s)")
+    ap.add_argument("--synthetic", type=int, default=0, help="ajoute N tâches aléatoires (charge)")
+    ap.add_argument("--out", type=Path, help="trace CSV")
+    args = ap.parse_args(argv)
+    start = args.start or datetime.now().replace(microsecond=0)
+    simulate(args.db, args.days, start, args.duration, args.grace, args.synthetic, args.out)
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
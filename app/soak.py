@@ -0,0 +1,160 @@
+# ==============================
+# app/soak.py
+# ==============================
+"""Harnais d'endurance mémoire: enchaîne des milliers de jobs simulés via `_make_job`.
+
+    python -m app.soak --jobs 5000
+    python -m app.soak --jobs 20000 --backend vlc --sound ~/Music/chime.wav
+
+Mesure tracemalloc et la RSS après une phase de chauffe, et sort en erreur (code 1)
+si la mémoire continue de monter sur l'ensemble des points de mesure.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import logging
+import os
+import struct
+import sys
+import tempfile
+import tracemalloc
+import wave
+from pathlib import Path
+from typing import List, Tuple
+from .audio_player import AudioPlayer, make_backend, NullBackend
+from .history import RunCounters, RunHistoryWriter
+from .jobs import JobsMixin
+from .media_control import NullMediaController
+from .models import Settings, Task, TaskType
+from .storage import Storage
+
+log = logging.getLogger("SoundsScheduler")
+
+
+def rss_bytes() -> int:
+    """RSS courante (Linux: /proc/self/statm), 0 si indisponible."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class _NoScheduler:
+    """Les dépendantes sont comptées mais pas planifiées: le harnais les déclenche lui-même."""
+    def __init__(self):
+        self.once: List[Tuple[int, object]] = []
+
+    def schedule_once_at(self, task_id, run_date, func):
+        self.once.append((task_id, func))
+
+    def remove(self, task_id):
+        pass
+
+
+class SoakHost(JobsMixin):
+    def __init__(self, workdir: Path, backend: str):
+        self.storage = Storage(workdir / "soak.db")
+        self.history = RunHistoryWriter(self.storage, flush_seconds=0.5)
+        self.counters = RunCounters(self.storage, flush_seconds=0.5)
+        self.scheduler = _NoScheduler()
+        self.player = AudioPlayer(NullBackend() if backend == "null" else make_backend(backend))
+        self.media = NullMediaController()
+        self.settings = Settings(sound_dir=str(workdir), output_volume=80, spotify_control_mode="linux_mpris")
+        self.interval_running = True
+        self._dependents = {}
+
+    def close(self):
+        self.history.close()
+        self.counters.close()
+        self.player.close()
+        self.storage.conn.close()
+
+
+def _silent_wav(path: Path, ms: int = 20):
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1); w.setsampwidth(2); w.setframerate(8000)
+        w.writeframes(struct.pack("<h", 0) * (8 * ms))
+
+
+def _is_rising(samples: List[int], tolerance: int) -> bool:
+    """Vrai si la mémoire dépasse son plancher de plus de `tolerance` en montant à presque chaque mesure."""
+    if len(samples) < 3:
+        return False
+    growth = samples[-1] - min(samples)
+    steps = [b - a for a, b in zip(samples, samples[1:])]
+    rising_steps = sum(1 for d in steps if d > 0)
+    return growth > tolerance and rising_steps >= 0.8 * len(steps)
+
+
+def run(jobs: int, checkpoints: int, backend: str, sound: str | None, tolerance_kib: int, rss_tolerance_kib: int) -> bool:
+    with tempfile.TemporaryDirectory(prefix="soundsscheduler-soak-") as tmp:
+        return _run(Path(tmp), jobs, checkpoints, backend, sound, tolerance_kib, rss_tolerance_kib)
+
+
+def _run(workdir: Path, jobs: int, checkpoints: int, backend: str, sound: str | None,
+         tolerance_kib: int, rss_tolerance_kib: int) -> bool:
+    if not sound:
+        sound = str(workdir / "silence.wav")
+        _silent_wav(Path(sound))
+    host = SoakHost(workdir, backend)
+    host.player.preload([sound])
+    # une tâche de chaque type, dont une dépendante déclenchée après chaque exécution de la source
+    tasks = []
+    for t in (Task(None, "fixe", sound, TaskType.FIXED_TIME, 0, at_hour=8, at_minute=0),
+              Task(None, "intervalle", sound, TaskType.AFTER_DURATION, 60),
+              Task(None, "dépendante", sound, TaskType.AFTER_TASK, 5)):
+        if t.task_type == TaskType.AFTER_TASK:
+            t.after_task_id = tasks[0].id
+        t.id = host.storage.add_task(t)
+        tasks.append(t)
+    host._dependents = {tasks[0].id: [tasks[2]]}
+
+    warmup = max(1, jobs // 10)
+    every = max(1, (jobs - warmup) // max(2, checkpoints))
+    traced: List[int] = []
+    rss: List[int] = []
+    tracemalloc.start()
+    for i in range(jobs):
+        # un nouveau job à chaque fois, comme une replanification
+        host._make_job(tasks[i % 2])()
+        for _dep_id, func in host.scheduler.once:
+            func()
+        host.scheduler.once.clear()
+        if i >= warmup and (i - warmup) % every == 0:
+            host.history.flush()
+            gc.collect()
+            traced.append(tracemalloc.get_traced_memory()[0])
+            rss.append(rss_bytes())
+            print(f"{i:>8} jobs  tracemalloc={traced[-1]/1024:>9.1f} KiB  rss={rss[-1]/1024:>9.1f} KiB", flush=True)
+    tracemalloc.stop()
+    latencies = sorted(getattr(host.player.backend, "start_latencies_ms", ()))
+    if latencies:
+        print(f"latence de démarrage PCM: p50={latencies[len(latencies) // 2]:.1f} ms  "
+              f"p99={latencies[int(len(latencies) * 0.99)]:.1f} ms  max={latencies[-1]:.1f} ms")
+    host.close()
+
+    leak_py = _is_rising(traced, tolerance_kib * 1024)
+    leak_rss = bool(rss[0]) and _is_rising(rss, rss_tolerance_kib * 1024)
+    print(f"croissance tracemalloc: {(traced[-1]-min(traced))/1024:.1f} KiB, rss: {(rss[-1]-min(rss))/1024:.1f} KiB")
+    if leak_py or leak_rss:
+        print("ÉCHEC: la mémoire augmente continuellement" + (" (Python)" if leak_py else "") + (" (RSS)" if leak_rss else ""))
+        return False
+    print("OK: mémoire stable")
+    return True
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m app.soak", description=__doc__.splitlines()[0])
+    ap.add_argument("--jobs", type=int, default=5000)
+    ap.add_argument("--checkpoints", type=int, default=10)
+    ap.add_argument("--backend", choices=("null", "vlc", "pcm"), default="null")
+    ap.add_argument("--sound", help="fichier joué (défaut: WAV silencieux de 20 ms)")
+    ap.add_argument("--tolerance-kib", type=int, default=256, help="croissance tracemalloc tolérée")
+    ap.add_argument("--rss-tolerance-kib", type=int, default=4096, help="croissance RSS tolérée")
+    args = ap.parse_args(argv)
+    ok = run(args.jobs, args.checkpoints, args.backend, args.sound, args.tolerance_kib, args.rss_tolerance_kib)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
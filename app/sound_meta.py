@@ -0,0 +1,264 @@
+# ==============================
+# app/sound_meta.py
+# ==============================
+"""Cache des métadonnées des sons (durée, format, niveaux, forme d'onde).
+
+Les fichiers sont décodés dans un pool de processus; l'interface ne lit que le
+dictionnaire en mémoire (`get`, `duration_of`), jamais le disque ni l'audio.
+Le cache vit dans sa propre base (SOUND_CACHE_PATH), à côté de app.db: il peut
+être supprimé sans perte, il sera reconstruit.
+"""
+from __future__ import annotations
+import logging
+import math
+import multiprocessing
+import os
+import sqlite3
+import threading
+import wave
+from concurrent.futures import CancelledError, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+from .config import SOUND_CACHE_PATH
+from .models import SoundInfo
+
+log = logging.getLogger("SoundsScheduler")
+
+WAVEFORM_POINTS = 120       # colonnes de la vignette
+BLOCK_FRAMES = 65536        # décodage par blocs: mémoire bornée même pour un long fichier
+CACHE_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sounds (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    duration REAL,
+    channels INTEGER,
+    samplerate INTEGER,
+    peak_db REAL,
+    rms_db REAL,
+    waveform BLOB,
+    error TEXT
+)
+"""
+
+
+def _safe_import_decoders():
+    try:
+        import numpy  # type: ignore
+    except Exception:
+        numpy = None
+    try:
+        import soundfile  # type: ignore
+    except Exception:
+        soundfile = None
+    return numpy, soundfile
+
+
+def _db(value: float) -> Optional[float]:
+    return round(20.0 * math.log10(value), 2) if value > 0 else None
+
+
+def analyze_sound(path: str) -> SoundInfo:
+    """Décode `path` et calcule ses métadonnées (exécuté dans un processus du pool)."""
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError as e:
+        return SoundInfo(path, 0.0, error=str(e))
+    np, sf = _safe_import_decoders()
+    try:
+        if sf is not None and np is not None:
+            return _analyze_soundfile(path, mtime, np, sf)
+        if Path(path).suffix.lower() == ".wav":
+            return _analyze_wave(path, mtime, np)
+        return SoundInfo(path, mtime, error="format non pris en charge sans soundfile")
+    except Exception as e:
+        return SoundInfo(path, mtime, error=str(e) or type(e).__name__)
+
+
+def _analyze_soundfile(path: str, mtime: float, np, sf) -> SoundInfo:
+    info = sf.info(path)
+    frames = int(info.frames)
+    env = _Envelope(np, frames)
+    for block in sf.blocks(path, blocksize=BLOCK_FRAMES, dtype="float32", always_2d=True):
+        env.add(block)
+    return SoundInfo(path, mtime, frames / float(info.samplerate) if info.samplerate else None,
+                     info.channels, info.samplerate, *env.result())
+
+
+def _analyze_wave(path: str, mtime: float, np) -> SoundInfo:
+    with wave.open(path, "rb") as w:
+        channels, rate, width, frames = w.getnchannels(), w.getframerate(), w.getsampwidth(), w.getnframes()
+        duration = frames / float(rate) if rate else None
+        if np is None or width not in (1, 2, 4):
+            return SoundInfo(path, mtime, duration, channels, rate)
+        dtype, scale, offset = {1: ("u1", 128.0, 128.0), 2: ("<i2", 32768.0, 0.0), 4: ("<i4", 2147483648.0, 0.0)}[width]
+        env = _Envelope(np, frames)
+        while True:
+            raw = w.readframes(BLOCK_FRAMES)
+            if not raw:
+                break
+            block = (np.frombuffer(raw, dtype=dtype).astype("float32") - offset) / scale
+            env.add(block.reshape(-1, channels))
+    return SoundInfo(path, mtime, duration, channels, rate, *env.result())
+
+
+class _Envelope:
+    """Crête, RMS et vignette de forme d'onde accumulées bloc par bloc."""
+
+    def __init__(self, np, frames: int):
+        self.np = np
+        self.per_bin = max(1, math.ceil(frames / WAVEFORM_POINTS))
+        self.bins = np.zeros(WAVEFORM_POINTS, dtype="float32")
+        self.pos = 0
+        self.peak = 0.0
+        self.sq = 0.0
+        self.count = 0
+
+    def add(self, block):
+        np = self.np
+        mono = np.abs(block).max(axis=1)
+        if not len(mono):
+            return
+        idx = np.minimum((self.pos + np.arange(len(mono))) // self.per_bin, WAVEFORM_POINTS - 1)
+        np.maximum.at(self.bins, idx, mono)
+        self.pos += len(mono)
+        self.peak = max(self.peak, float(mono.max()))
+        self.sq += float(np.square(block, dtype="float64").sum())
+        self.count += block.size
+
+    def result(self):
+        rms = math.sqrt(self.sq / self.count) if self.count else 0.0
+        wf = bytes(int(min(1.0, v) * 255) for v in self.bins.tolist())
+        return _db(self.peak), _db(rms), wf
+
+
+class SoundMetaCache:
+    """Métadonnées par chemin, invalidées par mtime; remplies en arrière-plan par `refresh`."""
+
+    def __init__(self, path: Path = SOUND_CACHE_PATH, workers: Optional[int] = None):
+        self.path = path
+        self.workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self._lock = threading.Lock()           # dictionnaire en mémoire
+        self._refresh_lock = threading.Lock()   # un seul rafraîchissement à la fois
+        self._by_path: Dict[str, SoundInfo] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._closed = False
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._init_db()
+        self._load()
+
+    def _init_db(self):
+        (uv,) = self.conn.execute("PRAGMA user_version").fetchone()
+        if uv != CACHE_VERSION:
+            # simple cache: on repart de zéro si le format change
+            with self.conn:
+                self.conn.execute("DROP TABLE IF EXISTS sounds")
+                self.conn.execute(SCHEMA)
+                self.conn.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+
+    def _load(self):
+        rows = self.conn.execute(
+            "SELECT path, mtime, duration, channels, samplerate, peak_db, rms_db, waveform, error FROM sounds"
+        ).fetchall()
+        with self._lock:
+            for r in rows:
+                self._by_path[r[0]] = SoundInfo(*r[:7], bytes(r[7] or b""), r[8])
+
+    # --- lecture (thread GUI): mémoire seulement
+    def get(self, path: str) -> Optional[SoundInfo]:
+        with self._lock:
+            return self._by_path.get(path)
+
+    def duration_of(self, path: str) -> Optional[float]:
+        info = self.get(path)
+        return info.duration if info is not None else None
+
+    # --- remplissage (worker d'arrière-plan)
+    def refresh(self, paths: Iterable[str], progress: Optional[Callable[[int, int], None]] = None) -> List[SoundInfo]:
+        """Analyse les fichiers absents ou modifiés depuis la dernière analyse; renvoie les nouvelles entrées."""
+        with self._refresh_lock:
+            todo = []
+            for p in dict.fromkeys(paths):
+                try:
+                    mtime = os.stat(p).st_mtime
+                except OSError:
+                    continue
+                cached = self.get(p)
+                if cached is None or cached.mtime != mtime:
+                    todo.append(p)
+            if not todo or self._closed:
+                return []
+            log.info("Analyse de %d son(s) (%d processus)", len(todo), self.workers)
+            if self._pool is None:
+                # spawn: pas de fork d'un processus Qt multi-thread
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            done: List[SoundInfo] = []
+            batch: List[SoundInfo] = []
+            try:
+                futures = [self._pool.submit(analyze_sound, p) for p in todo]
+                for fut in as_completed(futures):
+                    info = fut.result()
+                    if info.error:
+                        log.info("Son illisible %s: %s", info.path, info.error)
+                    batch.append(info)
+                    if len(batch) >= 50:
+                        self._store(batch)
+                        done += batch
+                        batch = []
+                    if progress:
+                        progress(len(done) + len(batch), len(todo))
+            except (BrokenProcessPool, CancelledError, RuntimeError) as e:
+                # processus tué ou pool arrêté (fermeture): on garde ce qui est déjà analysé
+                log.warning("Analyse des sons interrompue: %s", e)
+                self._pool = None
+            self._store(batch)
+            return done + batch
+
+    def _store(self, infos: List[SoundInfo]):
+        if not infos:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sounds (path, mtime, duration, channels, samplerate, peak_db, rms_db, waveform, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(i.path, i.mtime, i.duration, i.channels, i.samplerate, i.peak_db, i.rms_db, i.waveform, i.error)
+                 for i in infos],
+            )
+        with self._lock:
+            for i in infos:
+                self._by_path[i.path] = i
+
+    def close(self):
+        self._closed = True
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def describe(info: Optional[SoundInfo]) -> str:
+    """Résumé lisible pour l'interface (« 2,4 s · stéréo · 44,1 kHz · crête -1,2 dBFS »)."""
+    if info is None:
+        return "analyse en cours…"
+    if info.error:
+        return f"illisible ({info.error})"
+    parts = []
+    if info.duration is not None:
+        parts.append(format_duration(info.duration))
+    if info.channels:
+        parts.append({1: "mono", 2: "stéréo"}.get(info.channels, f"{info.channels} canaux"))
+    if info.samplerate:
+        parts.append(f"{info.samplerate / 1000:g} kHz".replace(".", ","))
+    if info.peak_db is not None:
+        parts.append(f"crête {info.peak_db:.1f} dBFS".replace(".", ","))
+    if info.rms_db is not None:
+        parts.append(f"RMS {info.rms_db:.1f} dBFS".replace(".", ","))
+    return " · ".join(parts)
+
+
+def format_duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.1f} s".replace(".", ",")
+    m, s = divmod(int(round(seconds)), 60)
+    return f"{m}:{s:02d}"
@@ -7,19 +7,31 @@ import sys
 import platform
 import time
 from typing import Optional
+from .mpris import MprisWatcher, PlayerState
 
 class SpotifyController:
-    def __init__(self, mode: str = "linux_mpris"):
+    def __init__(self, mode: str = "linux_mpris", watcher: Optional[MprisWatcher] = None):
         self.mode = mode
         self._cached_volume: Optional[float] = None  # 0.0 - 1.0
+        # état poussé par D-Bus (PropertiesChanged); None / non prêt => requêtes playerctl
+        self._watcher = watcher
 
     # --- low-level
     def _playerctl(self, *args) -> subprocess.CompletedProcess:
         return subprocess.run(["playerctl", "--player=spotify", *args], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
 
+    def _pushed_state(self) -> tuple[bool, Optional[PlayerState]]:
+        """(cache utilisable, état Spotify) — lecture mémoire, aucun appel D-Bus."""
+        if self._watcher is None or not self._watcher.ready:
+            return False, None
+        return True, self._watcher.get("spotify")
+
     # --- state
     def is_playing(self) -> bool:
         if self.mode == "linux_mpris" and platform.system() == "Linux":
+            cached, st = self._pushed_state()
+            if cached:
+                return st is not None and st.status == "Playing"
             cp = self._playerctl("status")
             return cp.stdout.strip().lower() == "playing"
         return False
@@ -28,6 +40,9 @@ class SpotifyController:
     def get_volume(self) -> Optional[float]:
         if self.mode != "linux_mpris" or platform.system() != "Linux":
             return None
+        cached, st = self._pushed_state()
+        if cached and st is not None and st.volume is not None:
+            return st.volume
         cp = self._playerctl("volume")
         try:
             v = float(cp.stdout.strip())
@@ -40,6 +55,8 @@ class SpotifyController:
             return
         v = max(0.0, min(1.0, float(v)))
         self._playerctl("volume", str(v))
+        if self._watcher is not None:
+            self._watcher.note_local("spotify", volume=v)
 
     def fade_to(self, target: float, duration_ms: int = 800, steps: int = 16):
         if self.mode != "linux_mpris" or platform.system() != "Linux":
@@ -2,20 +2,33 @@
 # app/storage.py
 # ==============================
 from __future__ import annotations
+import json
+import logging
 import sqlite3
+import threading
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, Iterable, List, Tuple
 from .config import DB_PATH
-from .models import Settings, Task, TaskType
+from .models import Settings, Task, TaskType, RunRecord, Zone
+from .history import LATENCY_BUCKETS_MS, ON_TIME_MS, latency_bucket
 
-SCHEMA = """
-PRAGMA journal_mode=WAL;
+log = logging.getLogger("SoundsScheduler")
+
+# Schéma complet de la version courante (création d'une base neuve)
+BASE_SCHEMA = """
 CREATE TABLE IF NOT EXISTS settings (
     id INTEGER PRIMARY KEY CHECK (id = 1),
     sound_dir TEXT NOT NULL,
     output_volume INTEGER NOT NULL,
     spotify_control_mode TEXT NOT NULL,
-    theme TEXT NOT NULL DEFAULT 'system'
+    theme TEXT NOT NULL DEFAULT 'system',
+    players_include TEXT NOT NULL DEFAULT '',
+    players_exclude TEXT NOT NULL DEFAULT '',
+    players_action TEXT NOT NULL DEFAULT 'pause',
+    audio_backend TEXT NOT NULL DEFAULT 'vlc',
+    zones TEXT NOT NULL DEFAULT '[]',
+    catchup_policy TEXT NOT NULL DEFAULT 'once'
 );
 CREATE TABLE IF NOT EXISTS tasks (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -31,93 +44,223 @@ CREATE TABLE IF NOT EXISTS tasks (
     start_at_hour INTEGER,
     start_at_minute INTEGER,
     after_task_id INTEGER,
-    run_count INTEGER DEFAULT 0
+    run_count INTEGER DEFAULT 0,
+    zone TEXT
+);
+"""
+
+# Tables d'historique (créées sur les anciennes bases par la migration v3)
+HISTORY_SCHEMA = """
+-- Historique brut des exécutions (purgé après HISTORY_RETENTION_DAYS)
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    scheduled_at TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    ended_at TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    latency_ms INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_task ON runs(task_id, scheduled_at);
+CREATE INDEX IF NOT EXISTS idx_runs_day ON runs(day);
+-- Agrégats journaliers (version sous-échantillonnée de l'historique)
+CREATE TABLE IF NOT EXISTS run_stats (
+    task_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    runs INTEGER NOT NULL DEFAULT 0,
+    on_time INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    timeouts INTEGER NOT NULL DEFAULT 0,
+    latency_sum_ms INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (task_id, day)
 );
+CREATE INDEX IF NOT EXISTS idx_run_stats_day ON run_stats(day);
+-- Histogramme de latence par tâche et par jour (pour les percentiles)
+CREATE TABLE IF NOT EXISTS run_latency (
+    task_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (task_id, day, bucket)
+);
+"""
+
+TASK_INDEXES = """
+-- Recherches des dépendantes et des tâches actives par type
+CREATE INDEX IF NOT EXISTS idx_tasks_after ON tasks(after_task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_enabled_type ON tasks(enabled, task_type);
 """
 
+SCHEMA = BASE_SCHEMA + HISTORY_SCHEMA + TASK_INDEXES
+
+# Colonnes ajoutées au fil des versions avant les migrations numérotées (v3 les rattrape)
+_LEGACY_COLUMNS = {
+    "tasks": [
+        ("max_occurrences", "INTEGER"),
+        ("start_now", "INTEGER DEFAULT 1"),
+        ("start_at_hour", "INTEGER"),
+        ("start_at_minute", "INTEGER"),
+        ("after_task_id", "INTEGER"),
+        ("run_count", "INTEGER DEFAULT 0"),
+        ("zone", "TEXT"),
+    ],
+    "run_stats": [
+        ("timeouts", "INTEGER NOT NULL DEFAULT 0"),
+    ],
+    "settings": [
+        ("theme", "TEXT NOT NULL DEFAULT 'system'"),
+        ("players_include", "TEXT NOT NULL DEFAULT ''"),
+        ("players_exclude", "TEXT NOT NULL DEFAULT ''"),
+        ("players_action", "TEXT NOT NULL DEFAULT 'pause'"),
+        ("audio_backend", "TEXT NOT NULL DEFAULT 'vlc'"),
+        ("zones", "TEXT NOT NULL DEFAULT '[]'"),
+    ],
+}
+
+
+def _statements(script: str) -> List[str]:
+    """Découpe un script SQL simple (sans ';' dans les littéraux) en instructions."""
+    lines = [l for l in script.splitlines() if not l.lstrip().startswith("--")]
+    return [s.strip() for s in "\n".join(lines).split(";") if s.strip()]
+
+
+def _migrate_v2(conn: sqlite3.Connection):
+    """Anciens types -> nouveaux (durées en secondes)."""
+    # every_x_minutes -> after_duration (minutes -> secondes)
+    conn.execute(
+        "UPDATE tasks SET param_value = param_value * 60, task_type = 'after_duration' "
+        "WHERE task_type = 'every_x_minutes'"
+    )
+    # every_x_hours -> after_duration (heures -> secondes)
+    conn.execute(
+        "UPDATE tasks SET param_value = param_value * 3600, task_type = 'after_duration' "
+        "WHERE task_type = 'every_x_hours'"
+    )
+    # after_task (legacy minutes) -> secondes
+    conn.execute(
+        "UPDATE tasks SET param_value = param_value * 60 WHERE task_type = 'after_task'"
+    )
+
+def _migrate_v3(conn: sqlite3.Connection):
+    """Rattrape les tables et colonnes ajoutées sans numéro de version."""
+    for stmt in _statements(HISTORY_SCHEMA):
+        conn.execute(stmt)
+    for table, columns in _LEGACY_COLUMNS.items():
+        existing = {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+        for name, decl in columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+def _migrate_v4(conn: sqlite3.Connection):
+    """Index des recherches sur tasks."""
+    for stmt in _statements(TASK_INDEXES):
+        conn.execute(stmt)
+
+
+def _migrate_v5(conn: sqlite3.Connection):
+    """Politique de rattrapage après une veille."""
+    conn.execute("ALTER TABLE settings ADD COLUMN catchup_policy TEXT NOT NULL DEFAULT 'once'")
+
+
+# Migrations ordonnées: (version atteinte, fonction). Ne jamais modifier une migration
+# publiée ni les scripts qu'elle exécute: ajouter la suivante et compléter SCHEMA
+# pour les bases neuves.
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (2, _migrate_v2),
+    (3, _migrate_v3),
+    (4, _migrate_v4),
+    (5, _migrate_v5),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
 class Storage:
     def __init__(self, path: Path = DB_PATH):
         self.path = path
         # Autoriser l'accès depuis le thread APScheduler
         self.conn = sqlite3.connect(self.path, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # Sérialise l'accès à la connexion partagée (UI, APScheduler, historique)
+        self._lock = threading.RLock()
         self._init_db()
 
     def _init_db(self):
-        with self.conn:
-            # Appliquer le schéma
-            self.conn.executescript(SCHEMA)
-
-            # Migrations si ancienne base
-            cols = {r[1] for r in self.conn.execute("PRAGMA table_info(tasks)")}
-            if "max_occurrences" not in cols:
-                self.conn.execute("ALTER TABLE tasks ADD COLUMN max_occurrences INTEGER")
-            if "start_now" not in cols:
-                self.conn.execute("ALTER TABLE tasks ADD COLUMN start_now INTEGER DEFAULT 1")
-            if "start_at_hour" not in cols:
-                self.conn.execute("ALTER TABLE tasks ADD COLUMN start_at_hour INTEGER")
-            if "start_at_minute" not in cols:
-                self.conn.execute("ALTER TABLE tasks ADD COLUMN start_at_minute INTEGER")
-            if "after_task_id" not in cols:
-                self.conn.execute("ALTER TABLE tasks ADD COLUMN after_task_id INTEGER")
-            if "run_count" not in cols:
-                self.conn.execute("ALTER TABLE tasks ADD COLUMN run_count INTEGER DEFAULT 0")
-                
-            # settings: ajouter colonne theme si absente
-            s_cols = {r[1] for r in self.conn.execute("PRAGMA table_info(settings)")}
-            if "theme" not in s_cols:
-                self.conn.execute("ALTER TABLE settings ADD COLUMN theme TEXT NOT NULL DEFAULT 'system'")
-
-
-            # Migration de compat: anciens types -> nouveaux (user_version < 2)
+        """Crée ou met à jour le schéma; sur une base à jour, seul `user_version` est lu."""
+        with self._lock:
             (uv,) = self.conn.execute("PRAGMA user_version").fetchone()
-            if (uv or 0) < 2:
-                # every_x_minutes -> after_duration (minutes -> secondes)
-                self.conn.execute(
-                    "UPDATE tasks SET param_value = param_value * 60, task_type = 'after_duration' "
-                    "WHERE task_type = 'every_x_minutes'"
-                )
-                # every_x_hours -> after_duration (heures -> secondes)
-                self.conn.execute(
-                    "UPDATE tasks SET param_value = param_value * 3600, task_type = 'after_duration' "
-                    "WHERE task_type = 'every_x_hours'"
-                )
-                # after_task (legacy minutes) -> secondes
-                self.conn.execute(
-                    "UPDATE tasks SET param_value = param_value * 60 WHERE task_type = 'after_task'"
-                )
-                self.conn.execute("PRAGMA user_version = 2")
-
-            # Seed settings si absent
-            cur = self.conn.execute("SELECT 1 FROM settings WHERE id=1")
-            if not cur.fetchone():
-                self.conn.execute(
-                    "INSERT INTO settings (id, sound_dir, output_volume, spotify_control_mode, theme) VALUES (1, ?, ?, ?, ?)",
-                    (str(Path.home() / "Music"), 80, "linux_mpris", "system"),
-                )
+            if uv >= SCHEMA_VERSION:
+                return
+            fresh = self.conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='tasks'").fetchone() is None
+            if fresh:
+                self._in_transaction(self._create_schema)
+                log.info("Base créée (schéma v%d)", SCHEMA_VERSION)
+                return
+            for version, migrate in MIGRATIONS:
+                if uv < version:
+                    self._in_transaction(migrate, version)
+                    log.info("Migration de la base v%d -> v%d", uv, version)
+                    uv = version
+
+    def _in_transaction(self, func, version: int = SCHEMA_VERSION):
+        """Exécute `func(conn)` et fixe user_version dans la même transaction (DDL compris)."""
+        self.conn.execute("BEGIN")
+        try:
+            func(self.conn)
+            self._seed_settings(self.conn)
+            self.conn.execute(f"PRAGMA user_version = {int(version)}")
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection):
+        for stmt in _statements(SCHEMA):
+            conn.execute(stmt)
+
+    @staticmethod
+    def _seed_settings(conn: sqlite3.Connection):
+        # Seed settings si absent (colonnes d'origine seulement: valable à toute version)
+        conn.execute(
+            "INSERT OR IGNORE INTO settings (id, sound_dir, output_volume, spotify_control_mode) VALUES (1, ?, ?, ?)",
+            (str(Path.home() / "Music"), 80, "linux_mpris"),
+        )
 
 
     # -- settings
     def load_settings(self) -> Settings:
-        row = self.conn.execute("SELECT * FROM settings WHERE id=1").fetchone()
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM settings WHERE id=1").fetchone()
         return Settings(
             sound_dir=row["sound_dir"],
             output_volume=row["output_volume"],
             spotify_control_mode=row["spotify_control_mode"],
             theme=row["theme"] if "theme" in row.keys() and row["theme"] else "system",
+            players_include=row["players_include"] or "",
+            players_exclude=row["players_exclude"] or "",
+            players_action=row["players_action"] or "pause",
+            audio_backend=row["audio_backend"] or "vlc",
+            zones=[Zone(z["name"], z.get("device", "")) for z in json.loads(row["zones"] or "[]")],
+            catchup_policy=row["catchup_policy"] or "once",
         )
 
     def save_settings(self, s: Settings):
-        with self.conn:
+        with self._lock, self.conn:
             self.conn.execute(
-                "UPDATE settings SET sound_dir=?, output_volume=?, spotify_control_mode=?, theme=? WHERE id=1",
-                (s.sound_dir, s.output_volume, s.spotify_control_mode, getattr(s, "theme", "system")),
+                "UPDATE settings SET sound_dir=?, output_volume=?, spotify_control_mode=?, theme=?, "
+                "players_include=?, players_exclude=?, players_action=?, audio_backend=?, zones=?, catchup_policy=? WHERE id=1",
+                (s.sound_dir, s.output_volume, s.spotify_control_mode, getattr(s, "theme", "system"),
+                 s.players_include, s.players_exclude, s.players_action, s.audio_backend,
+                 json.dumps([{"name": z.name, "device": z.device} for z in s.zones]), s.catchup_policy),
             )
 
 
     # -- tasks
     def list_tasks(self) -> List[Task]:
-        rows = self.conn.execute("SELECT * FROM tasks ORDER BY id DESC").fetchall()
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM tasks ORDER BY id DESC").fetchall()
         out: List[Task] = []
         for r in rows:
             raw_type = r["task_type"]
@@ -132,48 +275,185 @@ class Storage:
                 start_now=bool(r["start_now"]) if r["start_now"] is not None else True,
                 start_at_hour=r["start_at_hour"], start_at_minute=r["start_at_minute"],
                 after_task_id=r["after_task_id"], run_count=r["run_count"] or 0,
+                zone=r["zone"] or None,
             ))
         return out
 
     def add_task(self, t: Task) -> int:
-        with self.conn:
+        with self._lock, self.conn:
             cur = self.conn.execute(
                 """
                 INSERT INTO tasks
                 (name, sound_path, task_type, param_value, at_hour, at_minute, enabled,
-                 max_occurrences, start_now, start_at_hour, start_at_minute, after_task_id, run_count)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 max_occurrences, start_now, start_at_hour, start_at_minute, after_task_id, run_count, zone)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (t.name, t.sound_path, t.task_type.value, t.param_value, t.at_hour, t.at_minute, int(t.enabled),
-                 t.max_occurrences, int(t.start_now), t.start_at_hour, t.start_at_minute, t.after_task_id, t.run_count),
+                 t.max_occurrences, int(t.start_now), t.start_at_hour, t.start_at_minute, t.after_task_id, t.run_count,
+                 t.zone),
             )
             return cur.lastrowid
 
     def update_task(self, t: Task):
         assert t.id is not None
-        with self.conn:
+        with self._lock, self.conn:
             self.conn.execute(
                 """
                 UPDATE tasks SET
                     name=?, sound_path=?, task_type=?, param_value=?, at_hour=?, at_minute=?, enabled=?,
-                    max_occurrences=?, start_now=?, start_at_hour=?, start_at_minute=?, after_task_id=?, run_count=?
+                    max_occurrences=?, start_now=?, start_at_hour=?, start_at_minute=?, after_task_id=?, run_count=?, zone=?
                 WHERE id=?
                 """,
                 (t.name, t.sound_path, t.task_type.value, t.param_value, t.at_hour, t.at_minute, int(t.enabled),
-                 t.max_occurrences, int(t.start_now), t.start_at_hour, t.start_at_minute, t.after_task_id, t.run_count, t.id),
+                 t.max_occurrences, int(t.start_now), t.start_at_hour, t.start_at_minute, t.after_task_id, t.run_count,
+                 t.zone, t.id),
             )
 
     def delete_task(self, task_id: int):
-        with self.conn:
-            self.conn.execute("DELETE FROM tasks WHERE id=?", (task_id,))
+        self.delete_tasks([task_id])
+
+    # -- opérations groupées (une transaction par action)
+    def delete_tasks(self, task_ids: Iterable[int]):
+        ids = [(i,) for i in task_ids]
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM tasks WHERE id=?", ids)
+            self.conn.executemany("DELETE FROM runs WHERE task_id=?", ids)
+            self.conn.executemany("DELETE FROM run_stats WHERE task_id=?", ids)
+            self.conn.executemany("DELETE FROM run_latency WHERE task_id=?", ids)
+
+    def set_enabled_many(self, task_ids: Iterable[int], enabled: bool) -> List[int]:
+        """Active/désactive les tâches; renvoie celles dont le compteur a été remis à 0.
+
+        Réactiver une tâche arrivée à sa limite `max_occurrences` la relance pour un cycle
+        complet (run_count remis à 0), comme l'édition; une tâche simplement désactivée
+        garde son compteur.
+        """
+        ids = list(task_ids)
+        reset: List[int] = []
+        with self._lock, self.conn:
+            if enabled and ids:
+                marks = ",".join("?" * len(ids))
+                reset = [r[0] for r in self.conn.execute(
+                    f"SELECT id FROM tasks WHERE id IN ({marks}) AND max_occurrences > 0 AND run_count >= max_occurrences",
+                    ids)]
+                self.conn.executemany("UPDATE tasks SET run_count=0 WHERE id=?", [(i,) for i in reset])
+            self.conn.executemany("UPDATE tasks SET enabled=? WHERE id=?", [(1 if enabled else 0, i) for i in ids])
+        return reset
+
+    def set_sound_many(self, task_ids: Iterable[int], sound_path: str):
+        with self._lock, self.conn:
+            self.conn.executemany("UPDATE tasks SET sound_path=? WHERE id=?", [(sound_path, i) for i in task_ids])
+
+    def shift_times(self, task_ids: Iterable[int], minutes: int):
+        """Décale l'heure fixe (et l'heure de départ si définie) de `minutes`, modulo 24 h."""
+        ids = [(minutes, minutes, i) for i in task_ids]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """
+                UPDATE tasks SET
+                    at_hour = (((at_hour * 60 + COALESCE(at_minute, 0) + ?) % 1440 + 1440) % 1440) / 60,
+                    at_minute = (((at_hour * 60 + COALESCE(at_minute, 0) + ?) % 1440 + 1440) % 1440) % 60
+                WHERE id=? AND task_type='fixed_time' AND at_hour IS NOT NULL
+                """, ids)
+            self.conn.executemany(
+                """
+                UPDATE tasks SET
+                    start_at_hour = (((start_at_hour * 60 + COALESCE(start_at_minute, 0) + ?) % 1440 + 1440) % 1440) / 60,
+                    start_at_minute = (((start_at_hour * 60 + COALESCE(start_at_minute, 0) + ?) % 1440 + 1440) % 1440) % 60
+                WHERE id=? AND start_at_hour IS NOT NULL
+                """, ids)
 
     # Helpers occurrences
-    def increment_run_count(self, task_id: int) -> int:
-        with self.conn:
-            self.conn.execute("UPDATE tasks SET run_count = COALESCE(run_count,0) + 1 WHERE id=?", (task_id,))
-            (val,) = self.conn.execute("SELECT run_count FROM tasks WHERE id=?", (task_id,)).fetchone()
-            return val
-
-    def set_enabled(self, task_id: int, enabled: bool):
-        with self.conn:
-            self.conn.execute("UPDATE tasks SET enabled=? WHERE id=?", (1 if enabled else 0, task_id))
\ No newline at end of file
+    def save_run_counts(self, counts: Dict[int, int], disable: Iterable[int] = ()):
+        """Écrit un lot de compteurs (valeurs absolues) et désactive les tâches terminées, en une transaction."""
+        with self._lock, self.conn:
+            self.conn.executemany("UPDATE tasks SET run_count=? WHERE id=?", [(v, k) for k, v in counts.items()])
+            self.conn.executemany("UPDATE tasks SET enabled=0 WHERE id=?", [(k,) for k in disable])
+
+    # -- historique des exécutions
+    def add_runs(self, records: Iterable[RunRecord]):
+        """Insère un lot d'exécutions et met à jour les agrégats, en une seule transaction."""
+        rows = []
+        stats: Dict[tuple, List[int]] = {}
+        buckets: Dict[tuple, int] = {}
+        for r in records:
+            day = r.scheduled_at.strftime("%Y-%m-%d")
+            lat = r.latency_ms
+            rows.append((r.task_id, day, r.scheduled_at.isoformat(), r.started_at.isoformat(),
+                         r.ended_at.isoformat(), r.outcome, lat))
+            acc = stats.setdefault((r.task_id, day), [0, 0, 0, 0, 0])
+            acc[0] += 1
+            acc[1] += 1 if (r.outcome == "ok" and lat <= ON_TIME_MS) else 0
+            acc[2] += 1 if r.outcome not in ("ok", "timeout") else 0
+            acc[3] += 1 if r.outcome == "timeout" else 0
+            acc[4] += lat
+            key = (r.task_id, day, latency_bucket(lat))
+            buckets[key] = buckets.get(key, 0) + 1
+        if not rows:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO runs (task_id, day, scheduled_at, started_at, ended_at, outcome, latency_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.conn.executemany(
+                """
+                INSERT INTO run_stats (task_id, day, runs, on_time, errors, timeouts, latency_sum_ms) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(task_id, day) DO UPDATE SET
+                    runs = runs + excluded.runs,
+                    on_time = on_time + excluded.on_time,
+                    errors = errors + excluded.errors,
+                    timeouts = timeouts + excluded.timeouts,
+                    latency_sum_ms = latency_sum_ms + excluded.latency_sum_ms
+                """,
+                [(tid, day, *acc) for (tid, day), acc in stats.items()],
+            )
+            self.conn.executemany(
+                """
+                INSERT INTO run_latency (task_id, day, bucket, count) VALUES (?, ?, ?, ?)
+                ON CONFLICT(task_id, day, bucket) DO UPDATE SET count = count + excluded.count
+                """,
+                [(tid, day, b, n) for (tid, day, b), n in buckets.items()],
+            )
+
+    def list_runs(self, task_id: int, day: str) -> List[sqlite3.Row]:
+        """Exécutions brutes d'une tâche pour un jour donné (YYYY-MM-DD)."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT * FROM runs WHERE task_id=? AND day=? ORDER BY scheduled_at", (task_id, day)
+            ).fetchall()
+
+    def run_stats(self, days: int = 7) -> Dict[int, dict]:
+        """Statistiques par tâche sur les `days` derniers jours, lues uniquement depuis les agrégats."""
+        since = (datetime.now() - timedelta(days=max(0, days - 1))).strftime("%Y-%m-%d")
+        with self._lock:
+            totals = self.conn.execute(
+                "SELECT task_id, SUM(runs) AS runs, SUM(on_time) AS on_time, SUM(errors) AS errors, "
+                "SUM(timeouts) AS timeouts, SUM(latency_sum_ms) AS latency_sum_ms FROM run_stats WHERE day >= ? GROUP BY task_id",
+                (since,),
+            ).fetchall()
+            hist = self.conn.execute(
+                "SELECT task_id, bucket, SUM(count) AS n FROM run_latency WHERE day >= ? GROUP BY task_id, bucket",
+                (since,),
+            ).fetchall()
+        out: Dict[int, dict] = {}
+        for r in totals:
+            out[r["task_id"]] = {
+                "runs": r["runs"], "on_time": r["on_time"], "errors": r["errors"], "timeouts": r["timeouts"],
+                "latency_sum_ms": r["latency_sum_ms"], "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            }
+        for r in hist:
+            if r["task_id"] in out:
+                out[r["task_id"]]["histogram"][r["bucket"]] = r["n"]
+        return out
+
+    def purge_runs(self, keep_days: int, keep_stats_days: int):
+        """Politique de rétention: supprime l'historique brut puis les agrégats trop anciens."""
+        now = datetime.now()
+        raw_limit = (now - timedelta(days=keep_days)).strftime("%Y-%m-%d")
+        stats_limit = (now - timedelta(days=keep_stats_days)).strftime("%Y-%m-%d")
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM runs WHERE day < ?", (raw_limit,))
+            self.conn.execute("DELETE FROM run_stats WHERE day < ?", (stats_limit,))
+            self.conn.execute("DELETE FROM run_latency WHERE day < ?", (stats_limit,))
@@ -3,17 +3,24 @@
 # ==============================
 from __future__ import annotations
 from PySide6 import QtWidgets, QtCore
-from pathlib import Path
 from ..models import Task, TaskType
+from ..sound_meta import describe
+from ..utils import scan_sound_files
+from .waveform import waveform_pixmap
 
 class AddTaskDialog(QtWidgets.QDialog):
-    def __init__(self, parent=None, task: Task | None = None, sound_dir: str | None = None, existing_tasks: list[Task] | None = None):
+    def __init__(self, parent=None, task: Task | None = None, sound_dir: str | None = None, existing_tasks: list[Task] | None = None,
+                 sounds: list[str] | None = None, zones: list[str] | None = None, sound_meta=None):
         super().__init__(parent)
         self.setWindowTitle("Nouvelle tâche" if task is None else "Modifier la tâche")
         self.resize(560, 380)
 
         self.name_edit = QtWidgets.QLineEdit()
         self.sound_combo = QtWidgets.QComboBox()
+        # aperçu du son choisi, lu dans le cache de métadonnées (SoundMetaCache.get: mémoire seulement)
+        self.sound_meta = sound_meta
+        self.sound_info_label = QtWidgets.QLabel()
+        self.sound_wave_label = QtWidgets.QLabel()
         self.type_combo = QtWidgets.QComboBox()
         self.type_combo.addItems(["à heure fixe", "après X temps (répété)", "après X temps une tâche"])  # FIXED_TIME, AFTER_DURATION, AFTER_TASK
 
@@ -39,13 +46,26 @@ class AddTaskDialog(QtWidgets.QDialog):
                 if task is None or t.id != getattr(task, 'id', None):
                     self.after_task_combo.addItem(f"#{t.id} — {t.name}", t.id)
 
-        if sound_dir:
+        # Zone de diffusion
+        self.zone_combo = QtWidgets.QComboBox()
+        self.zone_combo.addItem("Sortie par défaut", None)
+        for z in zones or []:
+            self.zone_combo.addItem(z, z)
+
+        if sounds is not None:
+            # liste déjà scannée en arrière-plan par la fenêtre principale
+            self.sound_combo.addItems(sounds)
+        elif sound_dir:
             self.refresh_sounds(sound_dir)
 
         form = QtWidgets.QFormLayout()
         form.addRow("Nom", self.name_edit)
         form.addRow("Son", self.sound_combo)
+        if self.sound_meta is not None:
+            form.addRow("", self.sound_info_label)
+            form.addRow("", self.sound_wave_label)
         form.addRow("Type", self.type_combo)
+        form.addRow("Zone", self.zone_combo)
 
         dur_row = QtWidgets.QHBoxLayout()
         dur_row.addWidget(self.dur_h); dur_row.addWidget(QtWidgets.QLabel("h"))
@@ -75,6 +95,8 @@ class AddTaskDialog(QtWidgets.QDialog):
         root.addLayout(form)
         root.addWidget(btns)
 
+        self.sound_combo.currentTextChanged.connect(self._show_sound_info)
+        self._show_sound_info(self.sound_combo.currentText())
         self.type_combo.currentIndexChanged.connect(self._on_type_change)
         self.start_now_check.stateChanged.connect(self._on_type_change)
         self._on_type_change(0)
@@ -87,9 +109,14 @@ class AddTaskDialog(QtWidgets.QDialog):
 
     def refresh_sounds(self, sound_dir: str):
         self.sound_combo.clear()
-        p = Path(sound_dir)
-        files = [str(fp) for fp in p.glob("**/*") if fp.suffix.lower() in {".mp3", ".wav", ".ogg", ".flac", ".aac", ".m4a"}]
-        self.sound_combo.addItems(files)
+        self.sound_combo.addItems(scan_sound_files(sound_dir))
+
+    def _show_sound_info(self, path: str):
+        if self.sound_meta is None:
+            return
+        info = self.sound_meta.get(path) if path else None
+        self.sound_info_label.setText(describe(info) if path else "")
+        self.sound_wave_label.setPixmap(waveform_pixmap(info.waveform if info else b""))
 
     def _on_type_change(self, *_):
         idx = self.type_combo.currentIndex()
@@ -117,6 +144,13 @@ class AddTaskDialog(QtWidgets.QDialog):
         if idx >= 0:
             self.sound_combo.setCurrentIndex(idx)
         self.enabled_check.setChecked(t.enabled)
+        if t.zone:
+            zi = self.zone_combo.findData(t.zone)
+            if zi < 0:
+                # zone supprimée des réglages: la garder visible plutôt que de la perdre
+                self.zone_combo.addItem(f"{t.zone} (inconnue)", t.zone)
+                zi = self.zone_combo.count() - 1
+            self.zone_combo.setCurrentIndex(zi)
 
         if t.task_type == TaskType.FIXED_TIME:
             self.type_combo.setCurrentIndex(0)
@@ -174,4 +208,5 @@ class AddTaskDialog(QtWidgets.QDialog):
             start_at_hour=(None if ttype == TaskType.AFTER_DURATION else (self.start_at_hour.value() if not self.start_now_check.isChecked() else None)),
             start_at_minute=(None if ttype == TaskType.AFTER_DURATION else (self.start_at_min.value() if not self.start_now_check.isChecked() else None)),
             after_task_id=after_id,
+            zone=self.zone_combo.currentData(),
         )
@@ -0,0 +1,23 @@
+# ==============================
+# app/ui/waveform.py
+# ==============================
+from __future__ import annotations
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor, QPainter, QPixmap
+
+def waveform_pixmap(data: bytes, width: int = 240, height: int = 36, color: QColor | None = None) -> QPixmap:
+    """Dessine la vignette de forme d'onde (crêtes 0..255, cf. sound_meta) — aucun décodage audio."""
+    pm = QPixmap(width, height)
+    pm.fill(Qt.transparent)
+    if not data:
+        return pm
+    p = QPainter(pm)
+    p.setPen(color or QColor(70, 130, 200))
+    mid = height / 2.0
+    n = len(data)
+    for x in range(width):
+        v = data[min(n - 1, x * n // width)] / 255.0
+        h = max(1.0, v * (height - 2) / 2.0)
+        p.drawLine(x, int(mid - h), x, int(mid + h))
+    p.end()
+    return pm
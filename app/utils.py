@@ -0,0 +1,24 @@
+# ==============================
+# app/utils.py
+# ==============================
+from __future__ import annotations
+import os
+from pathlib import Path
+from typing import Callable, List, Optional
+
+SOUND_EXTS = {".mp3", ".wav", ".ogg", ".flac", ".aac", ".m4a"}
+
+def scan_sound_files(sound_dir: str, progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+    """Liste récursive des fichiers audio de `sound_dir` (bloquant: à appeler hors du thread GUI)."""
+    out: List[str] = []
+    root = Path(sound_dir)
+    if not root.is_dir():
+        return out
+    for dirpath, _dirs, files in os.walk(root):
+        for name in files:
+            if Path(name).suffix.lower() in SOUND_EXTS:
+                out.append(str(Path(dirpath) / name))
+                if progress and len(out) % 200 == 0:
+                    progress(len(out), 0)
+    out.sort()
+    return out
@@ -0,0 +1,94 @@
+# ==============================
+# app/workers.py
+# ==============================
+from __future__ import annotations
+import logging
+from typing import Any, Callable, Optional, Set
+from PySide6 import QtCore
+
+log = logging.getLogger("SoundsScheduler")
+
+
+class WorkerSignals(QtCore.QObject):
+    finished = QtCore.Signal(object)
+    failed = QtCore.Signal(str)
+    progress = QtCore.Signal(int, int)      # (fait, total) — total = 0 si inconnu
+
+
+class Worker(QtCore.QRunnable):
+    """Exécute `fn` dans un QThreadPool; le résultat revient au thread GUI via les signaux."""
+
+    def __init__(self, fn: Callable[..., Any], *args, with_progress: bool = False, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        if with_progress:
+            self.kwargs["progress"] = self.signals.progress.emit
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            log.exception("Échec de l'opération en arrière-plan")
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(result)
+
+
+class TaskRunner(QtCore.QObject):
+    """Point d'entrée unique pour les opérations bloquantes lancées depuis l'UI.
+
+    - `submit()` : stockage + planification, exécutés un par un dans l'ordre de soumission
+      (pool à un seul thread), ce qui évite qu'un rechargement ne s'intercale dans un autre.
+    - `submit_background()` : travaux indépendants (scan de dossiers…) sur le pool global.
+    `busy_changed(n, libellé)` permet à la fenêtre d'afficher la progression.
+    """
+
+    busy_changed = QtCore.Signal(int, str)
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent)
+        self.serial_pool = QtCore.QThreadPool(self)
+        self.serial_pool.setMaxThreadCount(1)
+        self.background_pool = QtCore.QThreadPool.globalInstance()
+        self._running: Set[Worker] = set()
+        self._label = ""
+
+    def submit(self, fn: Callable[..., Any], *args, on_done: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[str], None]] = None, label: str = "", **kwargs) -> Worker:
+        return self._start(self.serial_pool, fn, args, kwargs, on_done, on_error, label)
+
+    def submit_background(self, fn: Callable[..., Any], *args, on_done: Optional[Callable[[Any], None]] = None,
+                          on_error: Optional[Callable[[str], None]] = None, label: str = "", **kwargs) -> Worker:
+        return self._start(self.background_pool, fn, args, kwargs, on_done, on_error, label)
+
+    def wait(self, msecs: int = 5000):
+        self.serial_pool.waitForDone(msecs)
+
+    def _start(self, pool, fn, args, kwargs, on_done, on_error, label) -> Worker:
+        w = Worker(fn, *args, **kwargs)
+        if on_done:
+            w.signals.finished.connect(on_done)
+        if on_error:
+            w.signals.failed.connect(on_error)
+        w.signals.progress.connect(lambda done, total, lbl=label: self._on_progress(lbl, done, total))
+        w.signals.finished.connect(lambda *_ , w=w: self._finish(w))
+        w.signals.failed.connect(lambda *_ , w=w: self._finish(w))
+        w.setAutoDelete(False)
+        self._running.add(w)
+        self._label = label or self._label
+        self.busy_changed.emit(len(self._running), self._label)
+        pool.start(w)
+        return w
+
+    def _on_progress(self, label: str, done: int, total: int):
+        txt = f"{label} ({done}/{total})" if total else f"{label} ({done})"
+        self.busy_changed.emit(len(self._running), txt)
+
+    def _finish(self, w: Worker):
+        self._running.discard(w)
+        if not self._running:
+            self._label = ""
+        self.busy_changed.emit(len(self._running), self._label)
@@ -0,0 +1,159 @@
+# ==============================
+# app/zones.py
+# ==============================
+from __future__ import annotations
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from .audio_player import AudioPlayer
+from .models import Task, Zone
+
+log = logging.getLogger("SoundsScheduler")
+
+DEFAULT_ZONE = ""       # sortie par défaut du moteur audio
+CLOSE_TIMEOUT_S = 2.0   # attente max à la fermeture de l'app (son coupé puis fondu de reprise des lecteurs)
+
+
+def parse_zones(text: str) -> List[Zone]:
+    """Une zone par ligne: "nom = périphérique" (périphérique facultatif)."""
+    zones: List[Zone] = []
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        name, _, device = line.partition("=")
+        zones.append(Zone(name.strip(), device.strip()))
+    return zones
+
+def format_zones(zones: List[Zone]) -> str:
+    return "\n".join(f"{z.name} = {z.device}" if z.device else z.name for z in zones)
+
+
+class ZonePlayer:
+    """Lecteur d'une zone: son propre AudioPlayer et son propre worker de lecture.
+
+    Les jobs confient leur exécution complète au worker de la zone (`submit`) et rendent
+    tout de suite la main au thread APScheduler: une file d'attente dans une zone
+    n'occupe pas les threads du planificateur et ne retarde pas les autres zones.
+    """
+
+    def __init__(self, zone: Zone, player: AudioPlayer):
+        self.zone = zone
+        self.player = player
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"zone-{zone.name or 'defaut'}")
+        self._pending: Set[object] = set()      # clés (id de tâche) en file ou en cours
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.zone.name
+
+    def set_volume(self, vol: int):
+        # appliqué tout de suite, même si un son est en cours dans la zone
+        self.player.set_volume(vol)
+
+    def submit(self, key, fn: Callable[[], None]) -> bool:
+        """Met `fn` en file sur le worker de la zone; False si `key` y est déjà (pas de doublon en file)."""
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+        try:
+            self._worker.submit(self._run, key, fn)
+        except RuntimeError:            # zone fermée (réglages modifiés)
+            with self._lock:
+                self._pending.discard(key)
+            raise
+        return True
+
+    def _run(self, key, fn: Callable[[], None]):
+        try:
+            fn()
+        except Exception:
+            log.exception("Exécution en erreur dans la zone '%s'", self.name or "défaut")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def play_blocking(self, file_path: str, expected_duration: Optional[float] = None):
+        # lecture manuelle: attend son tour dans la file de la zone
+        self._worker.submit(self.player.play_blocking, file_path, expected_duration).result()
+
+    def list_devices(self):
+        return self.player.list_devices()
+
+    def close(self, interrupt: bool = False) -> threading.Thread:
+        """Ferme la zone sans bloquer l'appelant (thread GUI).
+
+        Les lectures en file sont abandonnées; celle en cours se termine, ou est coupée si
+        `interrupt`. L'attente et la libération du lecteur (qui peuvent bloquer: fondus,
+        verrou de lecture VLC) se font sur un thread à part, renvoyé à l'appelant.
+        """
+        self._worker.shutdown(wait=False, cancel_futures=True)
+        th = threading.Thread(target=self._release, args=(interrupt,), daemon=True,
+                              name=f"zone-close-{self.name or 'defaut'}")
+        th.start()
+        return th
+
+    def _release(self, interrupt: bool):
+        try:
+            if interrupt:
+                self.player.stop()
+            self._worker.shutdown(wait=True)
+            self.player.close()
+        except Exception:
+            log.exception("Fermeture de la zone '%s' en erreur", self.name or "défaut")
+
+
+class ZoneRouter:
+    """Associe chaque zone configurée à un ZonePlayer; la zone par défaut existe toujours."""
+
+    def __init__(self, backend: str, zones: List[Zone], player_factory: Callable[..., AudioPlayer] = AudioPlayer):
+        self._zones: Dict[str, ZonePlayer] = {DEFAULT_ZONE: ZonePlayer(Zone(DEFAULT_ZONE), player_factory(backend))}
+        for z in zones:
+            if not z.name or z.name in self._zones:
+                log.warning("Zone ignorée (nom vide ou en double): %r", z.name)
+                continue
+            self._zones[z.name] = ZonePlayer(z, player_factory(backend, device=z.device))
+            log.info("Zone '%s' -> périphérique '%s'", z.name, z.device or "défaut")
+
+    @property
+    def default(self) -> ZonePlayer:
+        return self._zones[DEFAULT_ZONE]
+
+    def names(self) -> List[str]:
+        return [n for n in self._zones if n != DEFAULT_ZONE]
+
+    def get(self, name: Optional[str]) -> ZonePlayer:
+        zp = self._zones.get(name or DEFAULT_ZONE)
+        if zp is None:
+            log.warning("Zone inconnue '%s' — sortie par défaut", name)
+            return self.default
+        return zp
+
+    def preload(self, tasks: Iterable[Task]):
+        """Prépare les sons des tâches actives sur le lecteur de leur zone (backend PCM: décodage anticipé)."""
+        by_zone: Dict[str, List[str]] = {}
+        for t in tasks:
+            if t.enabled and t.sound_path:
+                name = t.zone if t.zone in self._zones else DEFAULT_ZONE
+                by_zone.setdefault(name, []).append(t.sound_path)
+        for name, paths in by_zone.items():
+            self._zones[name].player.preload(paths)
+
+    def problems(self) -> List[str]:
+        """Problèmes de moteur audio à afficher (un par message distinct)."""
+        return list(dict.fromkeys(zp.player.problem for zp in self._zones.values() if zp.player.problem))
+
+    def set_volume(self, vol: int):
+        for zp in self._zones.values():
+            zp.set_volume(vol)
+
+    def close(self, interrupt: bool = False, timeout: float = 0.0):
+        """Ferme toutes les zones; attend au plus `timeout` s la fin des lectures (0: n'attend pas)."""
+        threads = [zp.close(interrupt) for zp in self._zones.values()]
+        deadline = time.monotonic() + timeout
+        for th in threads:
+            th.join(max(0.0, deadline - time.monotonic()))